@@ -1,27 +1,40 @@
 from fastapi import FastAPI, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, String, DateTime, Text
+from sqlalchemy import Column, String, DateTime, Text, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from jose import JWTError, jwt
 from datetime import datetime
+from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator
+from shared.auth import TokenVerifier
+from shared.db import Database
+from shared.logs import RequestIdMiddleware, setup_logging
+from shared.responses import JSONResponse
+from shared.revocation import RevocationList, auth_service_fetch
+from shared.tracing import setup_tracing
 from typing import Optional
 import logging
 import os
 import uuid
 import httpx
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Настройка логирования: JSON-строки в stdout через очередь (см. shared/logs.py)
+setup_logging("applications-service")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-security = HTTPBearer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схему создаёт migrate.py, здесь только подключение к базе
+    database.connect()
+    revocations.start()
+    yield
+    await revocations.stop()
+    await database.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+app.add_middleware(RequestIdMiddleware)
+setup_tracing(app, "applications-service")
 
 # Настройка Prometheus метрик
 instrumentator = Instrumentator()
@@ -35,8 +48,7 @@ AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 JOBS_SERVICE_URL = os.getenv("JOBS_SERVICE_URL", "http://localhost:8003")
 PROFILE_SERVICE_URL = os.getenv("PROFILE_SERVICE_URL", "http://localhost:8002")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+database = Database(DATABASE_URL)
 Base = declarative_base()
 
 
@@ -54,24 +66,15 @@ class Application(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-Base.metadata.create_all(bind=engine)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with database.session() as db:
         yield db
-    finally:
-        db.close()
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+# Отозванные токены синхронизируются с auth-service в фоне (см. shared/revocation.py)
+revocations = RevocationList(auth_service_fetch(AUTH_SERVICE_URL, JWT_SECRET, JWT_ALGORITHM))
+# Проверенные claims кэшируются до exp токена (см. shared/auth.py)
+verify_token = TokenVerifier(JWT_SECRET, JWT_ALGORITHM, revocations=revocations)
 
 
 def get_user_id(token_data: dict = Depends(verify_token)):
@@ -109,9 +112,9 @@ class AcceptRequest(BaseModel):
 async def create_application(
     request: ApplicationCreate,
     candidate_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Creating application by candidate: {candidate_id} for job: {request.job_id}")
+    logger.info("Creating application by candidate: %s for job: %s", candidate_id, request.job_id)
     # Упрощенные проверки
     await check_job_exists(request.job_id)
     await check_resume_exists(request.resume_id, candidate_id)
@@ -123,9 +126,9 @@ async def create_application(
         cover_letter=request.cover_letter
     )
     db.add(application)
-    db.commit()
-    db.refresh(application)
-    logger.info(f"Application created successfully: {application.id}")
+    await db.commit()
+    await db.refresh(application)
+    logger.info("Application created successfully: %s", application.id)
     return {
         "id": application.id,
         "message": "Application submitted successfully",
@@ -138,9 +141,9 @@ async def accept_application(
     application_id: str,
     request: AcceptRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    application = db.query(Application).filter(Application.id == application_id).first()
+    application = await db.scalar(select(Application).where(Application.id == application_id))
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -153,7 +156,7 @@ async def accept_application(
     if request.comment:
         application.comment = request.comment
     
-    db.commit()
+    await db.commit()
     
     return {
         "id": application.id,
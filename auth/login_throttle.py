@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Hashable
+
+
+class SlidingWindowLimiter:
+    """Не больше limit событий на ключ за последние window секунд.
+
+    Для ключа хранятся времена учтённых событий (не больше limit), так что
+    окно скользит, а не сбрасывается на границе минуты. Число ключей
+    ограничено maxsize: при переполнении забывается ключ, к которому дольше
+    всего не обращались. limit <= 0 выключает ограничение.
+    """
+
+    def __init__(self, limit: int, window: float, maxsize: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._clock = clock
+        self._events: OrderedDict = OrderedDict()
+
+    def retry_after(self, key: Hashable) -> float:
+        """Через сколько секунд для ключа освободится место; 0 — событие допускается."""
+        if self.limit <= 0:
+            return 0.0
+        events = self._events.get(key)
+        if events is None:
+            return 0.0
+        now = self._clock()
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return 0.0
+        self._events.move_to_end(key)
+        if len(events) < self.limit:
+            return 0.0
+        return events[0] + self.window - now
+
+    def add(self, key: Hashable) -> None:
+        if self.limit <= 0:
+            return
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.limit)
+        events.append(self._clock())
+        self._events.move_to_end(key)
+        while len(self._events) > self.maxsize:
+            self._events.popitem(last=False)
+
+    def reset(self, key: Hashable) -> None:
+        self._events.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._events)
@@ -0,0 +1,16 @@
+"""
+Миграции схемы auth_db.
+
+Запуск: python migrate.py
+
+Создаёт недостающие таблицы сервиса (см. shared/migrations.py). Команда
+идемпотентна и выполняется под advisory lock, поэтому её можно запускать
+при каждом старте контейнера и из нескольких экземпляров сразу.
+"""
+from main import Base, DATABASE_URL
+from shared.migrations import run_migrations
+import asyncio
+
+
+if __name__ == "__main__":
+    asyncio.run(run_migrations(DATABASE_URL, Base.metadata))
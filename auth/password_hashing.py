@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from prometheus_client import Gauge, Histogram
+
+from passwords import hash_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+HASH_QUEUE_DEPTH = Gauge(
+    "auth_password_hash_queue_depth", "Password hash operations waiting for or running in the process pool",
+    multiprocess_mode="livesum"
+)
+HASH_SECONDS = Histogram(
+    "auth_password_hash_seconds", "Password hash operation time including the wait for a pool process",
+    ["operation"], buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+
+def available_cores() -> int:
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+
+def default_workers() -> int:
+    # Ядра, доступные процессу, делятся между воркерами gunicorn: у каждого свой пул
+    return max(1, available_cores() // int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+class PasswordHasher:
+    """bcrypt в пуле процессов, чтобы хеширование не занимало event loop.
+
+    Одна операция bcrypt — сотни миллисекунд CPU. В пуле их выполняется
+    не больше workers одновременно (PASSWORD_HASH_WORKERS, по умолчанию
+    ядра процесса), остальные ждут в очереди пула; глубина очереди видна
+    в auth_password_hash_queue_depth.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or default_workers()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._dummy_hash: Optional[str] = None
+
+    async def start(self):
+        """Запускает пул и считает хеш для verify_dummy; вызывается до приёма запросов."""
+        if self._dummy_hash is None:
+            # Один раз до приёма запросов: иначе каждый из одновременных входов с неизвестным
+            # email считал бы свой хеш, а первый отвечал бы вдвое дольше обычного входа.
+            # Заодно запускается процесс пула, и первый вход не ждёт его старта. Ожидание
+            # через run_in_executor: старт процесса spawn и bcrypt не блокируют event loop
+            loop = asyncio.get_running_loop()
+            self._dummy_hash = await loop.run_in_executor(self._pool(), hash_password, secrets.token_urlsafe(16))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, а не fork: в процессе сервиса уже работают потоки логов и трассировки,
+                # а fork копирует их блокировки в неизвестном состоянии
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        # BrokenProcessPool получают все операции, ждавшие упавший пул. Новый пул создаёт
+        # только первая из них, остальные повторяются уже в нём
+        with self._lock:
+            if self._executor is broken:
+                logger.warning("Password hash process pool is broken, starting a new one")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        return self._pool()
+
+    async def _run(self, operation: str, function, *args):
+        started = time.perf_counter()
+        HASH_QUEUE_DEPTH.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._pool()
+            try:
+                return await loop.run_in_executor(executor, function, *args)
+            except BrokenProcessPool:
+                # Процесс пула упал (например, по OOM): пул пересоздаётся, операция повторяется один раз
+                return await loop.run_in_executor(self._replace_broken(executor), function, *args)
+        finally:
+            HASH_QUEUE_DEPTH.dec()
+            HASH_SECONDS.labels(operation=operation).observe(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run("verify", verify_password, password, password_hash)
+
+    async def verify_dummy(self, password: str) -> bool:
+        """Проверка пароля для несуществующего пользователя: столько же bcrypt, ответ всегда False.
+
+        Без неё вход с неизвестным email отвечал бы быстрее, и по времени
+        ответа можно было бы перебирать зарегистрированные адреса.
+        """
+        await self.start()
+        await self.verify(password, self._dummy_hash)
+        return False
@@ -0,0 +1,13 @@
+from passlib.context import CryptContext
+
+# Модуль импортируют процессы пула PasswordHasher, поэтому в нём только bcrypt:
+# метрики prometheus_client в этих процессах завели бы свои файлы в PROMETHEUS_MULTIPROC_DIR
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    return pwd_context.verify(password, password_hash)
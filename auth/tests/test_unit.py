@@ -2,9 +2,32 @@
 Unit tests for auth service
 These tests always pass (mock tests)
 """
+import asyncio
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
 from unittest.mock import Mock, patch
 
+# shared/ лежит в корне репозитория, рядом с каталогами сервисов
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from fastapi.testclient import TestClient
+from jose import JWTError, jwt
+from sqlalchemy.dialects import postgresql
+
+import import_users
+import main
+from login_throttle import SlidingWindowLimiter
+from password_hashing import PasswordHasher
+from shared.auth import TokenVerifier
+from shared.revocation import SERVICE_ROLE, RevocationList, service_token
+
 
 def test_user_registration_success():
     """Test user registration - always passes"""
@@ -49,3 +72,254 @@ def test_jwt_token_creation():
     assert mock_token is not None
     assert len(mock_token) > 0
 
+
+def test_login_limiter_slides_window():
+    """Test login limiter admits limit attempts per sliding window"""
+    now = [0.0]
+    limiter = SlidingWindowLimiter(limit=2, window=60, clock=lambda: now[0])
+    
+    limiter.add("a@b.ru")
+    now[0] = 30
+    limiter.add("a@b.ru")
+    assert limiter.retry_after("a@b.ru") == 30
+    assert limiter.retry_after("c@d.ru") == 0
+    now[0] = 61
+    assert limiter.retry_after("a@b.ru") == 0
+    limiter.add("a@b.ru")
+    assert limiter.retry_after("a@b.ru") == 29
+
+
+def test_login_limiter_reset_and_bounds():
+    """Test login limiter reset, key eviction and disabled limit"""
+    limiter = SlidingWindowLimiter(limit=1, window=60, maxsize=2, clock=lambda: 0.0)
+    
+    for key in ("a", "b", "c"):
+        limiter.add(key)
+    assert len(limiter) == 2
+    assert limiter.retry_after("a") == 0
+    assert limiter.retry_after("c") == 60
+    limiter.reset("c")
+    assert limiter.retry_after("c") == 0
+    
+    disabled = SlidingWindowLimiter(limit=0, window=60)
+    disabled.add("a")
+    assert disabled.retry_after("a") == 0
+
+
+def test_revocation_list_drops_expired_entries():
+    """Test revocation list keeps only entries that have not expired"""
+    now = [1000.0]
+    revocations = RevocationList(fetch=None, interval=0, clock=lambda: now[0])
+    
+    revocations.replace({"active": 1500.0, "expired": 900.0, "expiring": 1000.0})
+    assert revocations.is_revoked("active")
+    assert not revocations.is_revoked("expired")
+    assert not revocations.is_revoked("expiring")
+    assert not revocations.is_revoked(None)
+    assert len(revocations) == 1
+    
+    revocations.add("local", 2000.0)
+    assert revocations.is_revoked("local")
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_sync_replaces_and_survives_failures():
+    """Test revocation sync replaces the list and keeps it when auth-service fails"""
+    responses = [{"a": 2000.0, "b": 2000.0}, RuntimeError("auth-service is down"), {"b": 2000.0}]
+    
+    async def fetch():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+    
+    revocations = RevocationList(fetch, interval=0, clock=lambda: 1000.0)
+    assert await revocations.sync()
+    assert revocations.is_revoked("a") and revocations.is_revoked("b")
+    
+    assert not await revocations.sync()
+    assert revocations.is_revoked("a") and revocations.is_revoked("b")
+    
+    assert await revocations.sync()
+    assert not revocations.is_revoked("a")
+    assert revocations.is_revoked("b")
+
+
+@pytest.mark.asyncio
+async def test_revocation_list_sync_keeps_revocations_added_during_fetch():
+    """Test a logout made while the list is being fetched survives the older snapshot"""
+    revocations = RevocationList(fetch=None, interval=0, clock=lambda: 1000.0)
+    
+    async def stale_fetch():
+        # Выход завершился, пока ответ auth-service был в пути: в ответе его нет
+        revocations.add("during", 2000.0)
+        return {"before": 2000.0}
+    
+    revocations.add("before", 2000.0)
+    revocations.fetch = stale_fetch
+    assert await revocations.sync()
+    assert revocations.is_revoked("before")
+    assert revocations.is_revoked("during")
+    
+    async def empty_fetch():
+        return {}
+    
+    # Следующий запрос начат после add() и считается полным: локальная копия больше не держится
+    revocations.fetch = empty_fetch
+    assert await revocations.sync()
+    assert not revocations.is_revoked("during")
+
+
+def test_service_token_carries_service_role():
+    """Test revocation sync authenticates with a short-lived service token"""
+    claims = jwt.decode(service_token("secret", "HS256"), "secret", algorithms=["HS256"])
+    assert claims["role"] == SERVICE_ROLE
+    assert claims["exp"] - time.time() <= 60
+
+
+def test_token_verifier_rejects_revoked_token_from_cache():
+    """Test a cached token is rejected once its jti is revoked"""
+    revocations = RevocationList(fetch=None, interval=0)
+    verifier = TokenVerifier("secret", "HS256", maxsize=10, ttl=300, revocations=revocations)
+    expires_at = int(time.time()) + 600
+    token = jwt.encode({"sub": "user-1", "jti": "token-1", "exp": expires_at}, "secret", algorithm="HS256")
+    other = jwt.encode({"sub": "user-1", "jti": "token-2", "exp": expires_at}, "secret", algorithm="HS256")
+    
+    assert verifier.verify(token)["sub"] == "user-1"
+    assert verifier.verify(other)["jti"] == "token-2"
+    assert len(verifier._entries) == 2
+    
+    revocations.add("token-1", expires_at)
+    with pytest.raises(JWTError):
+        verifier.verify(token)
+    assert verifier.verify(other)["jti"] == "token-2"
+    
+    # Отозванный токен отклоняется и без кэша, при разборе
+    fresh = TokenVerifier("secret", "HS256", maxsize=0, revocations=revocations)
+    with pytest.raises(JWTError):
+        fresh.verify(token)
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_replaces_broken_pool_once():
+    """Test a killed pool process gives one new pool for all operations that were waiting"""
+    hasher = PasswordHasher(workers=2)
+    with patch("password_hashing.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pools:
+        try:
+            await hasher._run("hash", time.sleep, 0)
+            broken = hasher._executor
+            operations = [asyncio.create_task(hasher._run("hash", time.sleep, 0.5)) for _ in range(4)]
+            await asyncio.sleep(0.2)
+            os.kill(next(iter(broken._processes)), signal.SIGKILL)
+            
+            assert await asyncio.gather(*operations) == [None] * 4
+            assert pools.call_count == 2
+            assert hasher._executor is not broken
+            assert broken._shutdown_thread
+        finally:
+            hasher.shutdown()
+
+
+class FakeUserSession:
+    """Сессия вместо базы для /api/auth/users/batch: отвечает на SELECT по массиву id"""
+    
+    def __init__(self, users):
+        self.users = users
+        self.statements = []
+    
+    async def execute(self, statement):
+        self.statements.append(statement)
+        ids = statement.compile(dialect=postgresql.dialect()).params["ids"]
+        return [SimpleNamespace(**self.users[user_id]) for user_id in ids if user_id in self.users]
+
+
+@pytest.fixture
+def user_lookup():
+    session = FakeUserSession({
+        user_id: {"id": user_id, "email": f"{user_id}@example.com", "full_name": f"User {user_id}", "role": "candidate"}
+        for user_id in ("u1", "u2")
+    })
+    
+    async def get_db():
+        yield session
+    
+    main.app.dependency_overrides[main.get_db] = get_db
+    token = main.create_access_token({"sub": "u1", "email": "u1@example.com", "role": "candidate"})
+    yield TestClient(main.app), {"Authorization": f"Bearer {token}"}, session
+    main.app.dependency_overrides.clear()
+
+
+def test_user_lookup_requires_token(user_lookup):
+    """Test batch user lookup rejects requests without a valid bearer token"""
+    client, _, session = user_lookup
+    
+    assert client.post("/api/auth/users/batch", json={"ids": ["u1"]}).status_code == 403
+    response = client.post("/api/auth/users/batch", json={"ids": ["u1"]}, headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+    assert session.statements == []
+
+
+def test_user_lookup_returns_known_users_in_one_query(user_lookup):
+    """Test batch user lookup skips unknown ids, merges duplicates and returns public fields only"""
+    client, headers, session = user_lookup
+    
+    response = client.post("/api/auth/users/batch", json={"ids": ["u1", "missing", "u2", "u1"]}, headers=headers)
+    assert response.status_code == 200
+    users = response.json()["users"]
+    assert sorted(users) == ["u1", "u2"]
+    assert users["u2"] == {"id": "u2", "email": "u2@example.com", "full_name": "User u2", "role": "candidate"}
+    assert len(session.statements) == 1
+    assert session.statements[0].compile(dialect=postgresql.dialect()).params["ids"] == ["u1", "missing", "u2"]
+
+
+def test_user_lookup_limits_ids(user_lookup):
+    """Test batch user lookup rejects oversized batches and skips the query for an empty one"""
+    client, headers, session = user_lookup
+    
+    ids = [f"id-{number}" for number in range(main.USER_LOOKUP_MAX_IDS + 1)]
+    assert client.post("/api/auth/users/batch", json={"ids": ids}, headers=headers).status_code == 422
+    response = client.post("/api/auth/users/batch", json={"ids": []}, headers=headers)
+    assert response.json() == {"users": {}}
+    assert session.statements == []
+
+
+def test_import_statement_skips_taken_emails():
+    """Test user import inserts from the COPY staging table and skips existing emails"""
+    sql = " ".join(str(import_users.import_statement().compile(dialect=postgresql.dialect())).split())
+    
+    assert sql.startswith(
+        "INSERT INTO users (id, email, password_hash, full_name, role, created_at) SELECT "
+    )
+    assert f"FROM {import_users.IMPORT_STAGING_TABLE} ON CONFLICT (email) DO NOTHING RETURNING users.email" in sql
+
+
+@pytest.mark.asyncio
+async def test_import_batch_reports_email_conflicts():
+    """Test emails taken in the database or earlier in the batch are reported, not hashed or inserted"""
+    password_hash = "$2b$12$" + "a" * 53
+    batch = [
+        (1, {"email": "new@example.com", "full_name": "New", "role": "candidate", "password": "secret"}),
+        (2, {"email": "taken@example.com", "full_name": "Taken", "role": "candidate", "password": "secret"}),
+        (3, {"email": "new@example.com", "full_name": "Again", "role": "candidate", "password_hash": password_hash}),
+        (4, {"email": "raced@example.com", "full_name": "Raced", "role": "employer", "password_hash": password_hash}),
+        (5, {"email": "not-an-email", "full_name": "Bad", "role": "candidate", "password": "secret"}),
+    ]
+    hasher = Mock()
+    hasher.hash = Mock(side_effect=lambda password: asyncio.sleep(0, result=password_hash))
+    inserted_rows = []
+    
+    async def insert_users(rows):
+        inserted_rows.extend(rows)
+        # raced@example.com занят между проверкой и вставкой: его отбрасывает ON CONFLICT
+        return {row[1] for row in rows} - {"raced@example.com"}
+    
+    async def existing_emails(emails):
+        return {"taken@example.com"} & set(emails)
+    
+    report = import_users.ImportReport()
+    with patch("import_users.insert_users", insert_users), patch("import_users.existing_emails", existing_emails):
+        await import_users.import_batch(batch, hasher, report)
+    
+    assert [row[1] for row in inserted_rows] == ["new@example.com", "raced@example.com"]
+    assert hasher.hash.call_count == 1
+    assert (report.read, report.inserted, report.existing, report.invalid, report.hashed) == (5, 1, 3, 1, 1)
@@ -0,0 +1,139 @@
+"""
+Бенчмарк одновременных входов в auth-service: bcrypt в event loop против пула процессов.
+
+Запуск (из корня репозитория):
+    python benchmarks/auth_login_concurrency.py --logins 64 --concurrency 16 --workers 4
+
+Приложение повторяет /api/auth/login без базы: пользователь один и
+хранится в памяти, пароль проверяется bcrypt с теми же настройками,
+что в сервисе. Режимы:
+- inline — прежний вариант, pwd_context.verify прямо в async-обработчике;
+- pool — PasswordHasher из auth/password_hashing.py (--workers процессов).
+
+--concurrency клиентов шлют --logins входов через ASGI-транспорт httpx,
+параллельно раз в --probe-interval мс опрашивается /health. Печатаются
+входы в секунду, задержки входа и задержки /health от момента, когда
+проба должна была уйти: пока bcrypt занимает event loop, ждут все
+запросы процесса, а не только входы.
+
+Пул ускоряет сами входы, только если у процесса больше одного ядра;
+на одном ядре выигрыш в том, что остальные запросы не ждут bcrypt.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "auth"))
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from password_hashing import PasswordHasher
+from passwords import pwd_context
+
+EMAIL = "benchmark@example.com"
+PASSWORD = "benchmark-password"
+
+
+class LoginRequest(BaseModel):
+    email: str
+    password: str
+
+
+def make_app(verify) -> FastAPI:
+    app = FastAPI()
+    password_hash = pwd_context.hash(PASSWORD)
+
+    @app.post("/api/auth/login")
+    async def login(request: LoginRequest):
+        if request.email != EMAIL or not await verify(request.password, password_hash):
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        return {"access_token": "token", "token_type": "bearer"}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+async def inline_verify(password: str, password_hash: str) -> bool:
+    return pwd_context.verify(password, password_hash)
+
+
+def quantile(values: list[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)] if values else 0.0
+
+
+async def measure(app: FastAPI, logins: int, concurrency: int, probe_interval: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        body = {"email": EMAIL, "password": PASSWORD}
+        (await client.post("/api/auth/login", json=body)).raise_for_status()
+        remaining = logins
+        login_timings, probe_timings = [], []
+        done = asyncio.Event()
+
+        async def client_loop():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                (await client.post("/api/auth/login", json=body)).raise_for_status()
+                login_timings.append(time.perf_counter() - started)
+
+        async def probe_loop():
+            while not done.is_set():
+                # Отсчёт от момента, когда проба должна была уйти: так видно и время,
+                # пока event loop не мог разбудить саму пробу
+                planned = time.perf_counter() + probe_interval
+                await asyncio.sleep(probe_interval)
+                (await client.get("/health")).raise_for_status()
+                probe_timings.append(time.perf_counter() - planned)
+
+        probe = asyncio.create_task(probe_loop())
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe
+    return {
+        "logins_per_s": logins / elapsed,
+        "login_p50_ms": quantile(login_timings, 0.50) * 1000,
+        "login_p95_ms": quantile(login_timings, 0.95) * 1000,
+        "health_p95_ms": quantile(probe_timings, 0.95) * 1000,
+        "health_max_ms": max(probe_timings) * 1000,
+        "probes": len(probe_timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0, help="процессов в пуле, 0 — по числу ядер")
+    parser.add_argument("--probe-interval", type=float, default=10, help="мс между запросами /health")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(args.workers or None)
+    asyncio.run(hasher.start())
+    print(f"logins: {args.logins}, concurrency: {args.concurrency}, pool workers: {hasher.workers}")
+    modes = {"inline": inline_verify, "pool": hasher.verify}
+    print(f"{'mode':<8}{'logins/s':>10}{'p50, ms':>10}{'p95, ms':>10}{'health p95':>12}{'health max':>12}{'probes':>8}")
+    try:
+        for name, verify in modes.items():
+            result = asyncio.run(measure(make_app(verify), args.logins, args.concurrency, args.probe_interval / 1000))
+            print(
+                f"{name:<8}{result['logins_per_s']:>10.1f}{result['login_p50_ms']:>10.0f}{result['login_p95_ms']:>10.0f}"
+                f"{result['health_p95_ms']:>12.1f}{result['health_max_ms']:>12.1f}{result['probes']:>8}"
+            )
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
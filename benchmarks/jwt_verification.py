@@ -0,0 +1,129 @@
+"""
+Микробенчмарк проверки JWT: python-jose на каждый запрос против кэша shared.auth.
+
+Запуск (из корня репозитория):
+    python benchmarks/jwt_verification.py --requests 5000 --tokens 1
+
+Два замера:
+- verify — сама проверка токена: jwt.decode против TokenVerifier.verify
+  с прогретым кэшем;
+- request — запрос к эндпоинту FastAPI через ASGI-транспорт httpx:
+  legacy — прежний verify_token из сервисов (sync-зависимость, jwt.decode
+  в пуле потоков), uncached — TokenVerifier с выключенным кэшем,
+  cached — TokenVerifier как в сервисах.
+
+--tokens задаёт, сколько разных токенов чередуется в запросах: 1 — один
+клиент шлёт свой токен раз за разом.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from shared.auth import TokenVerifier
+
+SECRET = "benchmark_secret"
+ALGORITHM = "HS256"
+
+
+def make_tokens(count: int) -> list[str]:
+    expires = int(time.time()) + 3600
+    return [
+        jwt.encode({"sub": f"user-{number}", "role": "candidate", "exp": expires}, SECRET, algorithm=ALGORITHM)
+        for number in range(count)
+    ]
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI()
+    security = HTTPBearer()
+
+    def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+        try:
+            return jwt.decode(credentials.credentials, SECRET, algorithms=[ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+    @app.get("/me")
+    async def me(token_data: dict = Depends(verify_token)):
+        return {"user_id": token_data.get("sub")}
+
+    return app
+
+
+def verifier_app(verifier: TokenVerifier) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(token_data: dict = Depends(verifier)):
+        return {"user_id": token_data.get("sub")}
+
+    return app
+
+
+def measure_verify(verify, tokens: list[str], rounds: int) -> float:
+    for token in tokens:
+        verify(token)
+    started = time.perf_counter()
+    for number in range(rounds):
+        verify(tokens[number % len(tokens)])
+    return (time.perf_counter() - started) / rounds
+
+
+async def measure_requests(app: FastAPI, tokens: list[str], requests: int) -> dict:
+    headers = [{"Authorization": f"Bearer {token}"} for token in tokens]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for header in headers:
+            (await client.get("/me", headers=header)).raise_for_status()
+        timings = []
+        for number in range(requests):
+            started = time.perf_counter()
+            response = await client.get("/me", headers=headers[number % len(headers)])
+            timings.append(time.perf_counter() - started)
+            response.raise_for_status()
+    timings.sort()
+    return {
+        "median_us": statistics.median(timings) * 1e6,
+        "p95_us": timings[int(len(timings) * 0.95) - 1] * 1e6,
+        "rps": len(timings) / sum(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--tokens", type=int, default=1)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens)
+    print(f"requests: {args.requests}, distinct tokens: {args.tokens}")
+
+    decode = measure_verify(lambda token: jwt.decode(token, SECRET, algorithms=[ALGORITHM]), tokens, args.requests)
+    cached = measure_verify(TokenVerifier(SECRET, ALGORITHM).verify, tokens, args.requests)
+    print(f"{'verify':<10}{'us/op':>10}")
+    print(f"{'decode':<10}{decode * 1e6:>10.1f}")
+    print(f"{'cached':<10}{cached * 1e6:>10.1f}")
+
+    apps = {
+        "legacy": legacy_app(),
+        "uncached": verifier_app(TokenVerifier(SECRET, ALGORITHM, maxsize=0)),
+        "cached": verifier_app(TokenVerifier(SECRET, ALGORITHM)),
+    }
+    print(f"{'request':<10}{'median, us':>12}{'p95, us':>10}{'req/s':>10}")
+    for name, app in apps.items():
+        result = asyncio.run(measure_requests(app, tokens, args.requests))
+        print(f"{name:<10}{result['median_us']:>12.0f}{result['p95_us']:>10.0f}{result['rps']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Бенчмарк сериализации ответов: JSON-кодировщик FastAPI против shared.responses.
+
+Запуск (из корня репозитория, база не нужна):
+    python benchmarks/response_encoding.py --limit 100 --rounds 2000
+
+Полезная нагрузка — страница /api/jobs/search на --limit карточек с фасетами,
+самый большой ответ в сервисах. Способы:
+- default — как FastAPI по умолчанию: даты строками isoformat() + "Z",
+  jsonable_encoder и json.dumps;
+- orjson-str — ORJSONResponse из FastAPI, даты всё ещё строками;
+- shared-dict — обработчик вернул словарь, default_response_class=JSONResponse:
+  jsonable_encoder, затем orjson;
+- shared — JSONResponse(...) из shared.responses напрямую, datetime как есть.
+
+Печатаются медиана и p95 кодирования одной страницы и размер тела, затем
+то же для полного запроса через ASGI-транспорт httpx.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse as FastAPIJSONResponse, ORJSONResponse
+
+from shared.responses import JSONResponse
+
+TITLES = ["Python-разработчик", "Аналитик данных", "Менеджер по продажам", "Бухгалтер", "DevOps-инженер"]
+COMPANIES = ["ООО Ромашка", "Яндекс", "Сбер", "Тинькофф", "СКБ Контур"]
+LOCATIONS = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Удалённо"]
+
+
+def make_payload(limit: int) -> dict:
+    generator = random.Random(42)
+    started = datetime(2024, 5, 1, 12, 0, 0)
+    results = []
+    for number in range(limit):
+        salary_from = generator.randrange(50, 300) * 1000
+        results.append({
+            "id": f"job-{number:08d}-{generator.getrandbits(64):016x}",
+            "title": generator.choice(TITLES),
+            "company_name": generator.choice(COMPANIES),
+            "location": generator.choice(LOCATIONS),
+            "salary_from": float(salary_from),
+            "salary_to": float(salary_from + generator.randrange(0, 100) * 1000),
+            "currency": "RUB",
+            "employment_type": generator.choice(["full-time", "part-time", "remote"]),
+            "posted_at": started - timedelta(minutes=number, microseconds=generator.randrange(1_000_000))
+        })
+    return {
+        "page": 1,
+        "limit": limit,
+        "total": 12345,
+        "has_more": True,
+        "next_cursor": "WyIyMDI0LTA1LTAxVDEyOjAwOjAwIiwiam9iLTEiXQ",
+        "results": results,
+        "facets": {
+            "location": [{"value": location, "count": generator.randrange(1000)} for location in LOCATIONS],
+            "employment_type": [{"value": "full-time", "count": 800}, {"value": "remote", "count": 200}]
+        }
+    }
+
+
+def with_string_dates(payload: dict) -> dict:
+    # Так собирал карточки job_summary до shared.responses
+    payload = dict(payload)
+    payload["results"] = [
+        {**result, "posted_at": result["posted_at"].isoformat() + "Z"} for result in payload["results"]
+    ]
+    return payload
+
+
+def encoders(payload: dict) -> dict:
+    string_payload = with_string_dates(payload)
+    return {
+        "default": lambda: FastAPIJSONResponse(jsonable_encoder(string_payload)).body,
+        "orjson-str": lambda: ORJSONResponse(string_payload).body,
+        "shared-dict": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "shared": lambda: JSONResponse(payload).body,
+    }
+
+
+def measure_encoding(encode, rounds: int) -> dict:
+    body = encode()
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        encode()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "median_us": statistics.median(timings) * 1e6,
+        "p95_us": timings[int(len(timings) * 0.95) - 1] * 1e6,
+        "bytes": len(body),
+    }
+
+
+def make_apps(payload: dict) -> dict:
+    string_payload = with_string_dates(payload)
+
+    default_app = FastAPI()
+
+    @default_app.get("/search")
+    async def default_search():
+        return string_payload
+
+    orjson_app = FastAPI()
+
+    @orjson_app.get("/search")
+    async def orjson_search():
+        return ORJSONResponse(string_payload)
+
+    shared_dict_app = FastAPI(default_response_class=JSONResponse)
+
+    @shared_dict_app.get("/search")
+    async def shared_dict_search():
+        return payload
+
+    shared_app = FastAPI(default_response_class=JSONResponse)
+
+    @shared_app.get("/search")
+    async def shared_search():
+        return JSONResponse(payload)
+
+    return {"default": default_app, "orjson-str": orjson_app, "shared-dict": shared_dict_app, "shared": shared_app}
+
+
+async def measure_requests(app: FastAPI, requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        (await client.get("/search")).raise_for_status()
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get("/search")
+            timings.append(time.perf_counter() - started)
+            response.raise_for_status()
+    timings.sort()
+    return {
+        "median_us": statistics.median(timings) * 1e6,
+        "p95_us": timings[int(len(timings) * 0.95) - 1] * 1e6,
+        "rps": len(timings) / sum(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    payload = make_payload(args.limit)
+    print(f"limit: {args.limit}, rounds: {args.rounds}")
+
+    print(f"{'encode':<12}{'median, us':>12}{'p95, us':>10}{'bytes':>8}")
+    for name, encode in encoders(payload).items():
+        result = measure_encoding(encode, args.rounds)
+        print(f"{name:<12}{result['median_us']:>12.1f}{result['p95_us']:>10.1f}{result['bytes']:>8}")
+
+    print(f"{'request':<12}{'median, us':>12}{'p95, us':>10}{'req/s':>10}")
+    for name, app in make_apps(payload).items():
+        result = asyncio.run(measure_requests(app, args.rounds))
+        print(f"{name:<12}{result['median_us']:>12.0f}{result['p95_us']:>10.0f}{result['rps']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
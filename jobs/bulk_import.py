@@ -0,0 +1,136 @@
+import codecs
+import json
+from typing import Any, Optional
+
+
+class MalformedBody(ValueError):
+    """Тело запроса нельзя разобрать дальше: строки после ошибки не читаются."""
+
+
+class NDJSONRowReader:
+    """Инкрементальный разбор NDJSON: по одному JSON-значению на строку.
+
+    feed() принимает очередной кусок тела и возвращает строки, которые в нём
+    завершились, как пары (номер строки, значение или ValueError). Ошибка в
+    одной строке не мешает читать следующие; фатальная ошибка (слишком
+    длинная строка) сохраняется в error, и чтение прекращается.
+    """
+
+    def __init__(self, max_row_bytes: int):
+        self.max_row_bytes = max_row_bytes
+        self.rows = 0
+        self.error: Optional[MalformedBody] = None
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> list[tuple[int, Any]]:
+        if self.error is not None:
+            return []
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        rows = [row for row in map(self._parse, lines) if row is not None]
+        if len(self._buffer) > self.max_row_bytes:
+            self.error = MalformedBody(f"Row {self.rows + 1} exceeds {self.max_row_bytes} bytes")
+        return rows
+
+    def finish(self) -> list[tuple[int, Any]]:
+        if self.error is not None:
+            return []
+        row = self._parse(self._buffer)
+        self._buffer = b""
+        return [row] if row is not None else []
+
+    def _parse(self, line: bytes):
+        if not line.strip():
+            return None
+        self.rows += 1
+        try:
+            return self.rows, json.loads(line)
+        except ValueError as exc:
+            return self.rows, ValueError(f"Invalid JSON: {exc}")
+
+
+class JSONArrayRowReader:
+    """Инкрементальный разбор JSON-массива: элементы отдаются по мере поступления.
+
+    Весь массив в памяти не собирается — буфер хранит только недочитанный
+    элемент. Синтаксическая ошибка в массиве фатальна: она сохраняется в
+    error, потому что после неё нельзя надёжно найти начало следующего
+    элемента. Элементы, разобранные до ошибки, всё равно возвращаются.
+    """
+
+    def __init__(self, max_row_bytes: int):
+        self.max_row_bytes = max_row_bytes
+        self.rows = 0
+        self.error: Optional[MalformedBody] = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self._expect_comma = False
+
+    def feed(self, chunk: bytes) -> list[tuple[int, Any]]:
+        return self._read(chunk, final=False)
+
+    def finish(self) -> list[tuple[int, Any]]:
+        rows = self._read(b"", final=True)
+        if self.error is None and not self._finished:
+            self.error = MalformedBody("Unexpected end of JSON array")
+        return rows
+
+    def _read(self, chunk: bytes, final: bool) -> list[tuple[int, Any]]:
+        rows = []
+        if self.error is not None:
+            return rows
+        try:
+            self._buffer += self._text.decode(chunk, final)
+            self._drain(rows, final)
+            if len(self._buffer) > self.max_row_bytes:
+                raise MalformedBody(f"Row {self.rows + 1} exceeds {self.max_row_bytes} bytes")
+        except UnicodeDecodeError as exc:
+            self.error = MalformedBody(f"Body is not valid UTF-8: {exc}")
+        except MalformedBody as exc:
+            self.error = exc
+        return rows
+
+    def _drain(self, rows: list, final: bool):
+        buffer = self._buffer
+        position = 0
+        try:
+            while True:
+                while position < len(buffer) and buffer[position].isspace():
+                    position += 1
+                if position == len(buffer):
+                    break
+                char = buffer[position]
+                if self._finished:
+                    raise MalformedBody("Unexpected data after JSON array")
+                if not self._started:
+                    if char != "[":
+                        raise MalformedBody("Body must be a JSON array")
+                    self._started = True
+                    position += 1
+                elif char == "]" and (self._expect_comma or self.rows == 0):
+                    self._finished = True
+                    position += 1
+                elif self._expect_comma:
+                    if char != ",":
+                        raise MalformedBody(f"Expected ',' after row {self.rows}")
+                    self._expect_comma = False
+                    position += 1
+                else:
+                    try:
+                        value, end = self._decoder.raw_decode(buffer, position)
+                    except ValueError as exc:
+                        if final:
+                            raise MalformedBody(f"Invalid JSON in row {self.rows + 1}: {exc}") from exc
+                        break
+                    # Число в конце буфера может продолжиться в следующем куске
+                    if end == len(buffer) and not final:
+                        break
+                    self.rows += 1
+                    rows.append((self.rows, value))
+                    self._expect_comma = True
+                    position = end
+        finally:
+            self._buffer = buffer[position:]
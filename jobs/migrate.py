@@ -0,0 +1,23 @@
+"""
+Миграции схемы jobs_db.
+
+Запуск: python migrate.py
+
+Создаёт недостающие таблицы и применяет SQL-файлы из migrations/ по
+порядку имён, записывая их в schema_migrations (см. shared/migrations.py).
+Индексы строятся через CREATE INDEX CONCURRENTLY, колонка search_vector
+добавляется без переписывания таблицы и заполняется пачками, поэтому
+команду можно запускать на рабочей базе: чтение и запись в jobs не
+блокируются. Все шаги идемпотентны, так что прерванную миграцию
+достаточно запустить повторно.
+"""
+from pathlib import Path
+from main import Base, DATABASE_URL
+from shared.migrations import run_migrations
+import asyncio
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+if __name__ == "__main__":
+    asyncio.run(run_migrations(DATABASE_URL, Base.metadata, MIGRATIONS_DIR))
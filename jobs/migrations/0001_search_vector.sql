@@ -0,0 +1,34 @@
+-- Полнотекстовый поиск: колонка tsvector, которую поддерживает триггер, и GIN-индекс по ней.
+-- Обычная nullable-колонка добавляется без переписывания таблицы, в отличие от
+-- GENERATED ... STORED, поэтому миграция применяется к работающей jobs_db.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+-- Заголовок весит больше описания: ts_rank_cd в поиске учитывает веса A и B
+CREATE OR REPLACE FUNCTION jobs_search_vector(title text, description text) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+           setweight(to_tsvector('russian', coalesce(description, '')), 'B')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION jobs_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := jobs_search_vector(NEW.title, NEW.description);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER jobs_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description ON jobs
+    FOR EACH ROW EXECUTE FUNCTION jobs_search_vector_update();
+
+-- Строки, записанные до появления триггера, заполняются пачками, каждая в своей
+-- транзакции. Временный частичный индекс находит ещё не заполненные строки без
+-- полного прохода по таблице на каждую пачку
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_search_vector_backfill ON jobs (id) WHERE search_vector IS NULL;
+
+-- migrate: repeat
+UPDATE jobs SET search_vector = jobs_search_vector(title, description)
+WHERE id IN (SELECT id FROM jobs WHERE search_vector IS NULL LIMIT 5000);
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_jobs_search_vector_backfill;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_search_vector ON jobs USING gin (search_vector);
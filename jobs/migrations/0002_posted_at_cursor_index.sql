@@ -0,0 +1,2 @@
+-- Keyset-пагинация поиска по (posted_at, id).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_posted_at_id ON jobs (posted_at, id);
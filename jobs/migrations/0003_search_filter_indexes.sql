@@ -0,0 +1,17 @@
+-- Индексы под фильтры поиска и выборки в обработчиках изменения вакансий.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- location ILIKE '%...%'
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_location_trgm ON jobs USING gin (location gin_trgm_ops);
+
+-- employment_type = ... с сортировкой по дате и с диапазоном зарплаты
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_employment_type_posted_at ON jobs (employment_type, posted_at, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_employment_type_salary ON jobs (employment_type, salary);
+
+-- Диапазон зарплаты без фильтра по типу занятости
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_salary_posted_at ON jobs (salary, posted_at);
+
+-- Выборки вакансий работодателя в PUT/PATCH/DELETE
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_jobs_employer_id_id ON jobs (employer_id, id);
+
+ANALYZE jobs;
@@ -0,0 +1,20 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+# Курсор keyset-пагинации: позиция последней выданной вакансии в порядке (posted_at, id).
+# Для клиента это непрозрачная строка, поэтому формат можно менять без изменения API.
+def encode_cursor(posted_at: datetime, job_id: str) -> str:
+    payload = json.dumps([posted_at.isoformat(), job_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        posted_at, job_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(posted_at), str(job_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,159 @@
+import fcntl
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Union
+
+
+class ChangeCounter:
+    """Поколение данных и момент последнего изменения в памяти процесса."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.generation = 0
+        self.changed_at: Optional[float] = None
+        self._clock = clock
+
+    def bump(self) -> None:
+        self.generation += 1
+        self.changed_at = self._clock()
+
+
+class SharedChangeCounter:
+    """То же в файле, отображённом в память, — общее для процессов одной машины.
+
+    Воркеры gunicorn открывают один и тот же файл, поэтому изменение,
+    сделанное через любой воркер, сразу видно остальным. bump() идёт под
+    flock, чтение — без системных вызовов, прямо из mmap. clock должен
+    быть общим для процессов: time.monotonic в Linux такой.
+    """
+
+    LAYOUT = struct.Struct("<qd")
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            # Новый файл заполняется нулями: поколение 0, изменений не было
+            if os.fstat(self._fd).st_size < self.LAYOUT.size:
+                os.ftruncate(self._fd, self.LAYOUT.size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, self.LAYOUT.size)
+
+    @property
+    def generation(self) -> int:
+        return self.LAYOUT.unpack_from(self._map)[0]
+
+    @property
+    def changed_at(self) -> Optional[float]:
+        generation, changed_at = self.LAYOUT.unpack_from(self._map)
+        return changed_at if generation else None
+
+    def bump(self) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            generation, _ = self.LAYOUT.unpack_from(self._map)
+            self.LAYOUT.pack_into(self._map, 0, generation + 1, self._clock())
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+Changes = Union[ChangeCounter, SharedChangeCounter]
+
+
+def change_counter(directory: Optional[str], name: str) -> Changes:
+    # Под gunicorn каталог PROMETHEUS_MULTIPROC_DIR есть у всех воркеров контейнера
+    # и очищается при старте мастера; без него счётчик живёт в памяти процесса
+    if directory:
+        return SharedChangeCounter(os.path.join(directory, name))
+    return ChangeCounter()
+
+
+class SearchCache:
+    """LRU-кэш с TTL для результатов поиска вакансий.
+
+    Записи живут в памяти процесса, а поколение данных берётся из changes,
+    который может быть общим для нескольких кэшей и процессов. Любое
+    изменение вакансий увеличивает поколение (invalidate() или
+    changes.bump()), и записи прошлых поколений больше не отдаются.
+    Значение, посчитанное запросом, который начался до инвалидации, тоже не
+    попадёт в кэш — set() сверяет поколение, захваченное перед обращением
+    к базе.
+
+    changed_within() сообщает, была ли инвалидация недавно: значения,
+    прочитанные с отстающей реплики сразу после записи, не стоит кэшировать.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+        changes: Optional[Changes] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.changes = ChangeCounter(clock) if changes is None else changes
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+
+    @property
+    def generation(self) -> int:
+        return self.changes.generation
+
+    @property
+    def invalidated_at(self) -> Optional[float]:
+        return self.changes.changed_at
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        generation, expires_at, value = entry
+        if generation != self.generation or expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        if generation != self.generation or self.maxsize <= 0:
+            return
+        self._entries[key] = (generation, self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self.changes.bump()
+        self._entries.clear()
+
+    def changed_within(self, seconds: float) -> bool:
+        invalidated_at = self.invalidated_at
+        return invalidated_at is not None and self._clock() - invalidated_at < seconds
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def search_filters_key(
+    mode: str,
+    query: Optional[str],
+    location: Optional[str],
+    employment_type: Optional[str],
+    salary_from: Optional[float],
+    salary_to: Optional[float],
+) -> tuple:
+    # Приводим к ключу только то, что не меняет выдачу: ILIKE и tsquery не зависят от регистра,
+    # пустые строки и нулевые границы зарплаты обработчик поиска и так игнорирует
+    return (
+        mode if query else None,
+        query.lower() if query else None,
+        location.lower() if location else None,
+        employment_type or None,
+        salary_from or None,
+        salary_to or None,
+    )
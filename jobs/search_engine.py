@@ -0,0 +1,207 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+TOKEN_PATTERN = re.compile(r"\w+")
+EMPTY = frozenset()
+
+
+def tokenize(text: Optional[str]) -> set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower())) if text else set()
+
+
+class IndexedJob:
+    __slots__ = (
+        "id", "sort_key", "updated_at", "salary", "employment_type", "location",
+        "title_tokens", "tokens", "summary"
+    )
+
+
+class InMemoryJobIndex:
+    """Поисковый индекс вакансий в памяти процесса.
+
+    Инвертированный индекс по словам title и description, словари по
+    employment_type и location и отсортированные массивы (salary, id) и
+    (posted_at, id). Любой фильтр превращается в множество id, выдача
+    собирается обходом массива дат от новых к старым — так же, как
+    сортирует SQL-путь, поэтому курсоры обоих бэкендов совместимы.
+
+    Слова сравниваются без стемминга: «разработчики» не найдёт
+    «разработчик», в отличие от полнотекстового поиска Postgres.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._lock = threading.RLock()
+        self._jobs: dict[str, IndexedJob] = {}
+        self._postings = defaultdict(set)
+        self._by_employment_type = defaultdict(set)
+        self._by_location = defaultdict(set)
+        self._by_posted_at: list[tuple[datetime, str]] = []
+        self._by_salary: list[tuple[float, str]] = []
+        self._deleted_during_build: Optional[set] = None
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def begin_build(self):
+        with self._lock:
+            self._deleted_during_build = set()
+
+    def finish_build(self):
+        with self._lock:
+            self._deleted_during_build = None
+            self.ready = True
+
+    def load(self, job, summary: dict):
+        # Строка из снимка базы: вакансия могла быть удалена, пока снимок читался
+        with self._lock:
+            if self._deleted_during_build and job.id in self._deleted_during_build:
+                return
+            self._add_if_newer(job, summary)
+
+    def upsert(self, job, summary: dict):
+        with self._lock:
+            if self._deleted_during_build:
+                self._deleted_during_build.discard(job.id)
+            self._add_if_newer(job, summary)
+
+    def remove(self, job_id: str):
+        with self._lock:
+            if self._deleted_during_build is not None:
+                self._deleted_during_build.add(job_id)
+            self._discard(job_id)
+
+    def versions(self) -> dict:
+        with self._lock:
+            return {job_id: job.updated_at for job_id, job in self._jobs.items()}
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        location: Optional[str] = None,
+        employment_type: Optional[str] = None,
+        salary_from: Optional[float] = None,
+        salary_to: Optional[float] = None,
+        by_relevance: bool = False,
+        after: Optional[tuple[datetime, str]] = None,
+        offset: int = 0,
+        limit: int = 10,
+    ) -> tuple[list[dict], int, Optional[tuple[datetime, str]]]:
+        """Возвращает страницу кратких карточек, общее число совпадений и
+        ключ (posted_at, id) последней карточки, если дальше есть ещё."""
+        tokens = tokenize(query)
+        if query and not tokens:
+            return [], 0, None
+        wanted = offset + limit + 1
+
+        with self._lock:
+            candidates = self._candidates(tokens, location, employment_type, salary_from, salary_to)
+            total = len(self._jobs) if candidates is None else len(candidates)
+
+            if by_relevance and tokens:
+                # Все кандидаты содержат все слова запроса, выше — те, у кого их больше в title
+                keys = heapq.nlargest(
+                    wanted,
+                    ((len(tokens & self._jobs[job_id].title_tokens), self._jobs[job_id].sort_key) for job_id in candidates)
+                )
+                keys = [sort_key for _, sort_key in keys]
+            else:
+                keys = self._newest(candidates, after, wanted)
+
+            page = keys[offset:offset + limit]
+            results = [self._jobs[job_id].summary for _, job_id in page]
+        return results, total, page[-1] if len(keys) > offset + limit else None
+
+    def _newest(self, candidates, after, wanted):
+        end = len(self._by_posted_at) if after is None else bisect.bisect_left(self._by_posted_at, after)
+        # Редкие фильтры дешевле отсортировать, частые — найти обходом от новых вакансий к старым
+        if candidates is not None and len(candidates) * 8 < end:
+            keys = (self._jobs[job_id].sort_key for job_id in candidates)
+            if after is not None:
+                keys = (key for key in keys if key < after)
+            return heapq.nlargest(wanted, keys)
+        keys = []
+        for position in range(end - 1, -1, -1):
+            key = self._by_posted_at[position]
+            if candidates is None or key[1] in candidates:
+                keys.append(key)
+                if len(keys) == wanted:
+                    break
+        return keys
+
+    def _candidates(self, tokens, location, employment_type, salary_from, salary_to):
+        sets = [self._postings.get(token, EMPTY) for token in tokens]
+        if employment_type:
+            sets.append(self._by_employment_type.get(employment_type, EMPTY))
+        if location:
+            needle = location.lower()
+            sets.append(set().union(*(ids for name, ids in self._by_location.items() if needle in name)))
+        if salary_from or salary_to:
+            low = bisect.bisect_left(self._by_salary, salary_from, key=lambda entry: entry[0]) if salary_from else 0
+            high = bisect.bisect_right(self._by_salary, salary_to, key=lambda entry: entry[0]) if salary_to else len(self._by_salary)
+            sets.append({job_id for _, job_id in self._by_salary[low:high]})
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def _add_if_newer(self, job, summary: dict):
+        # Версия с более старым updated_at не перетирает уже проиндексированную
+        current = self._jobs.get(job.id)
+        if current is not None and current.updated_at and job.updated_at and current.updated_at > job.updated_at:
+            return
+        self._discard(job.id)
+        indexed = IndexedJob()
+        indexed.id = job.id
+        indexed.sort_key = (job.posted_at or datetime.min, job.id)
+        indexed.updated_at = job.updated_at
+        indexed.salary = float(job.salary) if job.salary is not None else None
+        indexed.employment_type = job.employment_type
+        indexed.location = (job.location or "").lower()
+        indexed.title_tokens = tokenize(job.title)
+        indexed.tokens = indexed.title_tokens | tokenize(job.description)
+        indexed.summary = summary
+
+        self._jobs[job.id] = indexed
+        for token in indexed.tokens:
+            self._postings[token].add(job.id)
+        if indexed.employment_type:
+            self._by_employment_type[indexed.employment_type].add(job.id)
+        if indexed.location:
+            self._by_location[indexed.location].add(job.id)
+        bisect.insort(self._by_posted_at, indexed.sort_key)
+        if indexed.salary is not None:
+            bisect.insort(self._by_salary, (indexed.salary, job.id))
+
+    def _discard(self, job_id: str):
+        indexed = self._jobs.pop(job_id, None)
+        if indexed is None:
+            return
+        for token in indexed.tokens:
+            self._remove_from(self._postings, token, job_id)
+        if indexed.employment_type:
+            self._remove_from(self._by_employment_type, indexed.employment_type, job_id)
+        if indexed.location:
+            self._remove_from(self._by_location, indexed.location, job_id)
+        self._remove_sorted(self._by_posted_at, indexed.sort_key)
+        if indexed.salary is not None:
+            self._remove_sorted(self._by_salary, (indexed.salary, job_id))
+
+    @staticmethod
+    def _remove_from(mapping, key, job_id):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.discard(job_id)
+            if not ids:
+                del mapping[key]
+
+    @staticmethod
+    def _remove_sorted(entries, entry):
+        position = bisect.bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
@@ -3,8 +3,14 @@ Unit tests for jobs service
 These tests always pass (mock tests)
 """
 import pytest
+from datetime import datetime
 from unittest.mock import Mock
 
+from bulk_import import JSONArrayRowReader, MalformedBody, NDJSONRowReader
+from pagination import decode_cursor, encode_cursor
+from search_cache import SearchCache, SharedChangeCounter, search_filters_key
+from search_engine import InMemoryJobIndex
+
 
 def test_job_creation_success():
     """Test job creation - always passes"""
@@ -53,3 +59,197 @@ def test_employer_role_check():
     assert mock_user.role == "employer"
     assert mock_user.id is not None
 
+
+
+def test_search_cursor_round_trip():
+    """Test search cursor encodes and decodes the same position"""
+    posted_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    
+    cursor = encode_cursor(posted_at, "job-12345")
+    
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (posted_at, "job-12345")
+
+
+def test_search_cursor_rejects_garbage():
+    """Test malformed search cursors are rejected"""
+    for cursor in ["not-a-cursor", encode_cursor(datetime(2024, 1, 1), "job-1")[:-3], "W10"]:
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+def test_search_cache_expires_and_evicts():
+    """Test search cache honours TTL and LRU size"""
+    now = [0.0]
+    cache = SearchCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    
+    cache.set("a", 1, cache.generation)
+    cache.set("b", 2, cache.generation)
+    assert cache.get("a") == 1
+    cache.set("c", 3, cache.generation)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    now[0] = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
+
+
+def test_search_cache_invalidation_drops_stale_values():
+    """Test search cache ignores values computed before invalidation"""
+    cache = SearchCache(maxsize=10, ttl=60)
+    cache.set("python", 5, cache.generation)
+    generation = cache.generation
+    
+    cache.invalidate()
+    cache.set("moscow", 7, generation)
+    
+    assert cache.get("python") is None
+    assert cache.get("moscow") is None
+
+
+def test_search_cache_reports_recent_invalidation():
+    """Test search cache tells how long ago it was invalidated"""
+    now = [0.0]
+    cache = SearchCache(maxsize=10, ttl=60, clock=lambda: now[0])
+    assert not cache.changed_within(5)
+    
+    cache.invalidate()
+    now[0] = 3
+    assert cache.changed_within(5)
+    assert not cache.changed_within(0)
+    now[0] = 5
+    assert not cache.changed_within(5)
+
+
+def test_shared_change_counter_invalidates_other_workers(tmp_path):
+    """Test a write through one worker drops cached pages in another"""
+    path = str(tmp_path / "generation")
+    worker_a = SearchCache(maxsize=10, ttl=60, changes=SharedChangeCounter(path))
+    worker_b = SearchCache(maxsize=10, ttl=60, changes=SharedChangeCounter(path))
+    worker_b.set("python", 5, worker_b.generation)
+    assert worker_b.get("python") == 5
+    assert worker_b.invalidated_at is None
+    
+    worker_a.invalidate()
+    
+    assert worker_b.generation == worker_a.generation == 1
+    assert worker_b.get("python") is None
+    assert worker_b.changed_within(5)
+
+
+def test_search_filters_key_normalization():
+    """Test equivalent search filters share a cache key"""
+    assert search_filters_key("fulltext", "Python", "Москва", None, 0, None) == \
+        search_filters_key("fulltext", "python", "МОСКВА", "", None, None)
+    assert search_filters_key("fulltext", None, None, None, None, None) == \
+        search_filters_key("substring", "", None, None, None, None)
+    assert search_filters_key("fulltext", "python", None, None, None, None) != \
+        search_filters_key("substring", "python", None, None, None, None)
+
+
+def test_ndjson_reader_reports_rows_across_chunks():
+    """Test NDJSON rows split between chunks are parsed with row numbers"""
+    reader = NDJSONRowReader(max_row_bytes=1024)
+    
+    rows = reader.feed(b'{"title": "Backend"}\n{"title": "Fro')
+    rows += reader.feed(b'ntend"}\nnot json\n\n')
+    rows += reader.finish()
+    
+    assert rows[0] == (1, {"title": "Backend"})
+    assert rows[1] == (2, {"title": "Frontend"})
+    assert rows[2][0] == 3
+    assert isinstance(rows[2][1], ValueError)
+
+
+def test_json_array_reader_streams_elements():
+    """Test JSON array elements are yielded before the array is closed"""
+    reader = JSONArrayRowReader(max_row_bytes=1024)
+    body = '[{"title": "Backend", "salary": 250000}, {"title": "Москва"}]'.encode()
+    
+    first = reader.feed(body[:45])
+    rest = reader.feed(body[45:]) + reader.finish()
+    
+    assert first == [(1, {"title": "Backend", "salary": 250000})]
+    assert rest == [(2, {"title": "Москва"})]
+
+
+def test_json_array_reader_rejects_malformed_body():
+    """Test malformed JSON array bodies abort the import"""
+    for body in [b'{"title": "Backend"}', b'[{"title": "x"} {"title": "y"}]', b'[{"title": ', b'[{"a": 1}'.ljust(2048)]:
+        reader = JSONArrayRowReader(max_row_bytes=1024)
+        
+        rows = reader.feed(body) + reader.finish()
+        
+        assert isinstance(reader.error, MalformedBody)
+        assert rows in ([], [(1, {"title": "x"})], [(1, {"a": 1})])
+
+
+def test_ndjson_reader_stops_on_oversized_row():
+    """Test NDJSON reader aborts on rows above the size limit"""
+    reader = NDJSONRowReader(max_row_bytes=16)
+    
+    rows = reader.feed(b'{"title": "x"}\n{"title": "' + b"x" * 32)
+    
+    assert rows == [(1, {"title": "x"})]
+    assert isinstance(reader.error, MalformedBody)
+    assert reader.feed(b'"}\n') == []
+
+
+def indexed_job(job_id, title, posted_day, salary=None, location="Москва", employment_type="full_time", updated_day=1):
+    job = Mock()
+    job.id = job_id
+    job.title = title
+    job.description = "Удалённая работа"
+    job.salary = salary
+    job.location = location
+    job.employment_type = employment_type
+    job.posted_at = datetime(2024, 1, posted_day)
+    job.updated_at = datetime(2024, 2, updated_day)
+    return job
+
+
+def test_in_memory_index_filters_and_pages():
+    """Test in-memory index applies filters and keyset pagination"""
+    index = InMemoryJobIndex()
+    for job in [
+        indexed_job("job-1", "Python developer", 1, salary=100000),
+        indexed_job("job-2", "Python analyst", 2, salary=200000, location="Казань"),
+        indexed_job("job-3", "Go developer", 3, salary=300000),
+        indexed_job("job-4", "Python developer", 4, employment_type="part_time"),
+    ]:
+        index.upsert(job, {"id": job.id})
+    
+    results, total, last_key = index.search(query="python", limit=2)
+    assert [job["id"] for job in results] == ["job-4", "job-2"]
+    assert total == 3
+    
+    results, total, last_key = index.search(query="python", after=last_key, limit=2)
+    assert [job["id"] for job in results] == ["job-1"]
+    assert last_key is None
+    
+    results, total, _ = index.search(location="моск", salary_from=150000)
+    assert [job["id"] for job in results] == ["job-3"]
+    assert index.search(query="python", employment_type="part_time")[1] == 1
+    assert index.search(query="  ")[1] == 0
+
+
+def test_in_memory_index_keeps_newest_version():
+    """Test in-memory index updates, removals and stale snapshot rows"""
+    index = InMemoryJobIndex()
+    index.begin_build()
+    index.upsert(indexed_job("job-1", "Rust developer", 1, updated_day=2), {"id": "job-1"})
+    index.remove("job-2")
+    
+    index.load(indexed_job("job-1", "Python developer", 1, updated_day=1), {"id": "job-1"})
+    index.load(indexed_job("job-2", "Python developer", 2), {"id": "job-2"})
+    index.finish_build()
+    
+    assert index.ready
+    assert len(index) == 1
+    assert index.search(query="python")[1] == 0
+    assert index.search(query="rust")[1] == 1
+    
+    index.remove("job-1")
+    assert index.search(query="rust")[1] == 0
+    assert index.versions() == {}
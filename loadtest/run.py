@@ -0,0 +1,213 @@
+"""
+Нагрузочный тест всей платформы: сценарии пользователей против запущенных сервисов.
+
+Запуск (из корня репозитория, нужен только httpx):
+    # поднять docker-compose, прогнать 60 секунд с 50 пользователями, сохранить результат
+    python loadtest/run.py --compose --users 50 --duration 60
+
+    # сервисы уже запущены; сравнить с сохранённой базовой линией
+    python loadtest/run.py --users 50 --duration 60 --baseline loadtest/baseline.json
+
+    # сравнить два сохранённых результата без прогона
+    python loadtest/run.py --compare loadtest/baseline.json loadtest/results/20240501-120000.json
+
+Каждый виртуальный пользователь регистрируется как кандидат и в цикле
+выбирает сценарий по весам --mix: поиск вакансий, отклик (резюме и
+заявка), отзыв, уведомление, регистрация нового посетителя. Перед стартом
+работодатель публикует --jobs вакансий, на которые идут отклики.
+
+Первые --warmup секунд не учитываются. Для каждого эндпоинта печатаются
+запросы, ошибки, RPS и p50/p95/p99; результат сохраняется в JSON
+(--output). С --baseline результат сравнивается с базовой линией, и при
+росте p95/p99 или падении RPS больше --max-regression процентов скрипт
+завершается с кодом 1; эндпоинты, где меньше --min-requests запросов,
+не проверяются. --save-baseline записывает результат как новую базовую линию.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx
+
+from scenarios import DEFAULT_MIX, SCENARIOS, SERVICE_PORTS, Platform, post_jobs, register_login
+from stats import Recorder, compare, format_comparison, format_summary
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name] = int(weight)
+    return mix
+
+
+def service_urls(host: str) -> dict[str, str]:
+    # LOADTEST_AUTH_URL=http://... и т.п. переопределяют адрес отдельного сервиса
+    return {
+        name: os.getenv(f"LOADTEST_{name.upper()}_URL", f"http://{host}:{port}")
+        for name, port in SERVICE_PORTS.items()
+    }
+
+
+def compose_command() -> list[str]:
+    if shutil.which("docker-compose"):
+        return ["docker-compose"]
+    return ["docker", "compose"]
+
+
+async def wait_ready(client: httpx.AsyncClient, urls: dict[str, str], timeout: float):
+    deadline = time.monotonic() + timeout
+    pending = dict(urls)
+    while pending:
+        for name, url in list(pending.items()):
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    del pending[name]
+            except httpx.HTTPError:
+                pass
+        if pending and time.monotonic() > deadline:
+            raise SystemExit(f"services not ready after {timeout:.0f}s: {', '.join(pending)}")
+        if pending:
+            await asyncio.sleep(1)
+
+
+async def virtual_user(platform: Platform, mix: dict[str, int], deadline: float):
+    user = await register_login(platform)
+    if user is None:
+        return
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        scenario = SCENARIOS[random.choices(names, weights)[0]]
+        await scenario(platform, user)
+
+
+async def run_load(args, urls: dict[str, str]) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users * 2, max_keepalive_connections=args.users * 2)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client, urls, args.ready_timeout)
+        platform = Platform(client, urls, recorder)
+
+        employer = await register_login(platform, role="employer")
+        if employer is None:
+            raise SystemExit("could not register an employer: is auth-service up?")
+        await post_jobs(platform, employer, args.jobs)
+        print(f"posted {len(platform.job_ids)} jobs, starting {args.users} users for {args.warmup}+{args.duration}s")
+
+        started = time.monotonic()
+        deadline = started + args.warmup + args.duration
+        users = [asyncio.create_task(virtual_user(platform, args.mix, deadline)) for _ in range(args.users)]
+        await asyncio.sleep(args.warmup)
+        recorder.active = True
+        measured_from = time.monotonic()
+        await asyncio.gather(*users)
+        # Пользователи дорабатывают начатый сценарий, так что окно чуть длиннее --duration
+        duration = time.monotonic() - measured_from
+
+    result = recorder.summary(duration)
+    result.update({
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "duration_s": duration,
+        "config": {
+            "users": args.users,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "jobs": args.jobs,
+            "mix": args.mix,
+            "urls": urls,
+        },
+    })
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def load_result(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_result(result: dict, path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+    print(f"saved {path}")
+
+
+def report_comparison(baseline: dict, current: dict, max_regression: float, min_requests: int) -> int:
+    rows = compare(baseline, current, max_regression, min_requests)
+    print(f"\ncompared with baseline {baseline.get('commit') or ''} ({baseline.get('created_at', '')}), "
+          f"threshold {max_regression:.0f}%")
+    for name in ("users", "mix"):
+        if baseline.get("config", {}).get(name) != current.get("config", {}).get(name):
+            print(f"warning: {name} differs from baseline, numbers are not directly comparable")
+    print(format_comparison(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument("--ready-timeout", type=float, default=180)
+    parser.add_argument("--compose", action="store_true", help="docker-compose up -d --build перед прогоном")
+    parser.add_argument("--compose-down", action="store_true", help="docker-compose down после прогона")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--max-regression", type=float, default=20)
+    parser.add_argument("--min-requests", type=int, default=20)
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "RESULT"))
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = load_result(args.compare[0]), load_result(args.compare[1])
+        sys.exit(report_comparison(baseline, current, args.max_regression, args.min_requests))
+
+    if args.compose:
+        subprocess.run(compose_command() + ["up", "-d", "--build"], cwd=ROOT, check=True)
+    try:
+        result = asyncio.run(run_load(args, service_urls(args.host)))
+    finally:
+        if args.compose_down:
+            subprocess.run(compose_command() + ["down"], cwd=ROOT, check=False)
+
+    print(format_summary(result))
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    save_result(result, output)
+    if args.save_baseline:
+        save_result(result, args.save_baseline)
+    if args.baseline:
+        sys.exit(report_comparison(load_result(args.baseline), result, args.max_regression, args.min_requests))
+
+
+if __name__ == "__main__":
+    main()
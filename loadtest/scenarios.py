@@ -0,0 +1,149 @@
+"""Сценарии нагрузки: что делает один виртуальный пользователь платформы."""
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from stats import Recorder
+
+# Порты сервисов из docker-compose.yml
+SERVICE_PORTS = {
+    "auth": 8001,
+    "profile": 8002,
+    "jobs": 8003,
+    "applications": 8004,
+    "reviews": 8005,
+    "mailing": 8006,
+    "verification": 8007,
+    "notifications": 8008,
+}
+
+QUERIES = ["python", "разработчик", "аналитик", "менеджер", "go", "бухгалтер", ""]
+LOCATIONS = ["Москва", "Санкт-Петербург", "Казань", "Удалённо"]
+TITLES = ["Python-разработчик", "Аналитик данных", "Менеджер по продажам", "Бухгалтер", "Go developer"]
+EMPLOYMENT_TYPES = ["full_time", "part_time", "remote"]
+PASSWORD = "loadtest-password"
+
+
+@dataclass
+class User:
+    email: str
+    token: Optional[str] = None
+    user_id: Optional[str] = None
+    resumes: list[str] = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class Platform:
+    """HTTP-клиент ко всем сервисам, который замеряет каждый запрос.
+
+    Запрос записывается под именем endpoint, а не под фактическим URL,
+    чтобы /api/jobs/{id} и подобные пути сводились в одну строку отчёта.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, urls: dict[str, str], recorder: Recorder):
+        self.client = client
+        self.urls = urls
+        self.recorder = recorder
+        self.job_ids: list[str] = []
+
+    async def call(self, service: str, method: str, path: str, endpoint: Optional[str] = None, **kwargs):
+        endpoint = endpoint or f"{method} {path}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, self.urls[service] + path, **kwargs)
+        except httpx.HTTPError as error:
+            self.recorder.add(endpoint, time.perf_counter() - started, type(error).__name__, ok=False)
+            return None
+        self.recorder.add(endpoint, time.perf_counter() - started, str(response.status_code), ok=response.is_success)
+        return response if response.is_success else None
+
+
+def new_email(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12]}@loadtest.example"
+
+
+async def register_login(platform: Platform, role: str = "candidate") -> Optional[User]:
+    user = User(email=new_email(role))
+    registered = await platform.call("auth", "POST", "/api/auth/register", json={
+        "email": user.email, "password": PASSWORD, "full_name": "Load Test", "role": role
+    })
+    if registered is None:
+        return None
+    user.user_id = registered.json()["id"]
+    logged_in = await platform.call("auth", "POST", "/api/auth/login", json={"email": user.email, "password": PASSWORD})
+    if logged_in is None:
+        return None
+    user.token = logged_in.json()["access_token"]
+    return user
+
+
+async def post_jobs(platform: Platform, employer: User, count: int):
+    for _ in range(count):
+        response = await platform.call("jobs", "PUT", "/api/jobs", headers=employer.headers, json={
+            "title": random.choice(TITLES),
+            "description": "Вакансия для нагрузочного теста: python, sql, docker",
+            "requirements": ["python", "sql"],
+            "salary": random.randrange(50, 300) * 1000,
+            "currency": "RUB",
+            "location": random.choice(LOCATIONS),
+            "employment_type": random.choice(EMPLOYMENT_TYPES),
+        })
+        if response is not None:
+            platform.job_ids.append(response.json()["id"])
+
+
+async def search_jobs(platform: Platform, user: User):
+    params = {"query": random.choice(QUERIES), "limit": random.choice([20, 20, 20, 100])}
+    if random.random() < 0.3:
+        params["location"] = random.choice(LOCATIONS)
+    await platform.call("jobs", "GET", "/api/jobs/search", params=params)
+
+
+async def apply(platform: Platform, user: User):
+    if not user.resumes:
+        response = await platform.call("profile", "POST", "/api/profile/resumes", headers=user.headers, json={
+            "title": "Резюме", "position": "Разработчик", "skills": ["python"],
+            "experience": [], "education": [], "description": "Нагрузочный тест"
+        })
+        if response is None:
+            return
+        user.resumes.append(response.json()["id"])
+    job_id = random.choice(platform.job_ids) if platform.job_ids else f"job-{uuid.uuid4()}"
+    await platform.call("applications", "POST", "/api/applications", headers=user.headers, json={
+        "job_id": job_id, "resume_id": user.resumes[0], "cover_letter": "Здравствуйте!"
+    })
+
+
+async def review(platform: Platform, user: User):
+    # Один отзыв на вакансию от пользователя: иначе сервис ответит 409
+    await platform.call("reviews", "POST", "/api/reviews", headers=user.headers, json={
+        "job_id": f"job-{uuid.uuid4()}", "rating": random.randint(1, 5), "comment": "Нормальная вакансия"
+    })
+
+
+async def notify(platform: Platform, user: User):
+    await platform.call("notifications", "POST", "/api/notifications/send", headers=user.headers, json={
+        "user_id": user.user_id, "title": "Новый отклик", "body": "На вакансию пришёл отклик", "type": "application"
+    })
+
+
+async def sign_up(platform: Platform, user: User):
+    # Новый посетитель: регистрация и вход, текущий пользователь не меняется
+    await register_login(platform)
+
+
+SCENARIOS = {
+    "search": search_jobs,
+    "apply": apply,
+    "review": review,
+    "notify": notify,
+    "signup": sign_up,
+}
+DEFAULT_MIX = "search=50,apply=15,review=10,notify=10,signup=15"
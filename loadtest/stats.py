@@ -0,0 +1,123 @@
+"""Сбор задержек по эндпоинтам, сводка результатов и сравнение с базовой линией."""
+import math
+from collections import defaultdict
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    # Nearest-rank: значение, не меньше которого fraction всех замеров
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Задержки и ошибки запросов, сгруппированные по имени эндпоинта.
+
+    Пока active ложно (разогрев), замеры не учитываются.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint: str, seconds: float, status: str, ok: bool):
+        if not self.active:
+            return
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, duration: float) -> dict:
+        endpoints = {}
+        for endpoint in sorted(self.latencies):
+            endpoints[endpoint] = summarize(
+                self.latencies[endpoint], self.errors[endpoint], duration, dict(self.statuses[endpoint])
+            )
+        every = [value for values in self.latencies.values() for value in values]
+        total = summarize(every, sum(self.errors.values()), duration)
+        return {"endpoints": endpoints, "total": total}
+
+
+def summarize(latencies: list[float], errors: int, duration: float, statuses: dict = None) -> dict:
+    values = sorted(latencies)
+    result = {
+        "requests": len(values),
+        "errors": errors,
+        "error_rate": errors / len(values) if values else 0.0,
+        "rps": len(values) / duration if duration else 0.0,
+        "mean_ms": sum(values) / len(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000 if values else 0.0,
+    }
+    if statuses is not None:
+        result["statuses"] = statuses
+    return result
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def compare(baseline: dict, current: dict, max_regression: float, min_requests: int = 20) -> list[dict]:
+    """Строки сравнения по эндпоинтам; regression — есть ли ухудшение сверх порога.
+
+    Регрессией считается рост p95 или p99 либо падение RPS больше чем на
+    max_regression процентов, а также рост доли ошибок больше чем на 1 п.п.
+    Эндпоинты, где с любой стороны меньше min_requests запросов, только
+    показываются: на паре десятков замеров p99 — это шум.
+    """
+    rows = []
+    names = sorted(set(baseline["endpoints"]) | set(current["endpoints"]))
+    for name in names + ["total"]:
+        before = baseline["total"] if name == "total" else baseline["endpoints"].get(name)
+        after = current["total"] if name == "total" else current["endpoints"].get(name)
+        if before is None or after is None:
+            rows.append({"endpoint": name, "missing": "baseline" if before is None else "current", "regression": False})
+            continue
+        row = {
+            "endpoint": name,
+            "rps": (before["rps"], after["rps"], change(before["rps"], after["rps"])),
+            "p95_ms": (before["p95_ms"], after["p95_ms"], change(before["p95_ms"], after["p95_ms"])),
+            "p99_ms": (before["p99_ms"], after["p99_ms"], change(before["p99_ms"], after["p99_ms"])),
+            "error_rate": (before["error_rate"], after["error_rate"], (after["error_rate"] - before["error_rate"]) * 100),
+        }
+        row["few_samples"] = min(before["requests"], after["requests"]) < min_requests
+        row["regression"] = not row["few_samples"] and (
+            row["rps"][2] < -max_regression
+            or row["p95_ms"][2] > max_regression
+            or row["p99_ms"][2] > max_regression
+            or row["error_rate"][2] > 1.0
+        )
+        rows.append(row)
+    return rows
+
+
+def format_summary(result: dict) -> str:
+    lines = [f"{'endpoint':<34}{'requests':>9}{'errors':>8}{'rps':>9}{'p50, ms':>9}{'p95, ms':>9}{'p99, ms':>9}"]
+    for name, stats in list(result["endpoints"].items()) + [("total", result["total"])]:
+        lines.append(
+            f"{name:<34}{stats['requests']:>9}{stats['errors']:>8}{stats['rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: list[dict]) -> str:
+    lines = [f"{'endpoint':<34}{'rps':>22}{'p95, ms':>22}{'p99, ms':>22}"]
+    for row in rows:
+        if "missing" in row:
+            lines.append(f"{row['endpoint']:<34}  missing in {row['missing']}")
+            continue
+        cells = "".join(
+            f"{f'{before:.1f}→{after:.1f} ({delta:+.0f}%)':>22}"
+            for before, after, delta in (row["rps"], row["p95_ms"], row["p99_ms"])
+        )
+        verdict = "REGRESSION" if row["regression"] else "few samples" if row["few_samples"] else "ok"
+        lines.append(f"{row['endpoint']:<34}{cells}  {verdict}")
+    return "\n".join(lines)
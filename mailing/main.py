@@ -1,26 +1,39 @@
 from fastapi import FastAPI, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import create_engine, Column, String, DateTime, Boolean, JSON, Text
+from sqlalchemy import Column, String, DateTime, Boolean, JSON, Text, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from jose import JWTError, jwt
 from datetime import datetime
+from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator
+from shared.auth import TokenVerifier
+from shared.db import Database
+from shared.logs import RequestIdMiddleware, setup_logging
+from shared.responses import JSONResponse
+from shared.revocation import RevocationList, auth_service_fetch
+from shared.tracing import setup_tracing
 from typing import Optional
 import logging
 import os
 import uuid
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Настройка логирования: JSON-строки в stdout через очередь (см. shared/logs.py)
+setup_logging("mailing-service")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-security = HTTPBearer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схему создаёт migrate.py, здесь только подключение к базе
+    database.connect()
+    revocations.start()
+    yield
+    await revocations.stop()
+    await database.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+app.add_middleware(RequestIdMiddleware)
+setup_tracing(app, "mailing-service")
 
 # Настройка Prometheus метрик
 instrumentator = Instrumentator()
@@ -32,8 +45,7 @@ JWT_SECRET = os.getenv("JWT_SECRET", "secret_key_for_jwt")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+database = Database(DATABASE_URL)
 Base = declarative_base()
 
 
@@ -62,24 +74,15 @@ class EmailMessage(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
-Base.metadata.create_all(bind=engine)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with database.session() as db:
         yield db
-    finally:
-        db.close()
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+# Отозванные токены синхронизируются с auth-service в фоне (см. shared/revocation.py)
+revocations = RevocationList(auth_service_fetch(AUTH_SERVICE_URL, JWT_SECRET, JWT_ALGORITHM))
+# Проверенные claims кэшируются до exp токена (см. shared/auth.py)
+verify_token = TokenVerifier(JWT_SECRET, JWT_ALGORITHM, revocations=revocations)
 
 
 def get_user_id(token_data: dict = Depends(verify_token)):
@@ -108,9 +111,9 @@ class SendEmailRequest(BaseModel):
 async def unsubscribe(
     request: UnsubscribeRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    subscription = db.query(Subscription).filter(Subscription.email == request.email).first()
+    subscription = await db.scalar(select(Subscription).where(Subscription.email == request.email))
     
     if not subscription:
         raise HTTPException(status_code=404, detail="User not found")
@@ -118,7 +121,7 @@ async def unsubscribe(
     subscription.subscribed = False
     subscription.categories = request.categories
     
-    db.commit()
+    await db.commit()
     
     return {
         "email": subscription.email,
@@ -132,9 +135,9 @@ async def unsubscribe(
 async def subscribe(
     request: SubscribeRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    subscription = db.query(Subscription).filter(Subscription.email == request.email).first()
+    subscription = await db.scalar(select(Subscription).where(Subscription.email == request.email))
     
     if subscription and subscription.subscribed:
         raise HTTPException(status_code=409, detail="User already subscribed")
@@ -150,8 +153,8 @@ async def subscribe(
         )
         db.add(subscription)
     
-    db.commit()
-    db.refresh(subscription)
+    await db.commit()
+    await db.refresh(subscription)
     
     return {
         "email": subscription.email,
@@ -165,12 +168,12 @@ async def subscribe(
 async def send_email(
     request: SendEmailRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Sending email to: {request.to}, subject: {request.subject}")
+    logger.info("Sending email to: %s, subject: %s", request.to, request.subject)
     # Проверка шаблона (упрощенная)
     if request.template_id and request.template_id not in ["welcome-template", "notification-template"]:
-        logger.warning(f"Email template not found: {request.template_id}")
+        logger.warning("Email template not found: %s", request.template_id)
         raise HTTPException(status_code=404, detail="Email template not found")
     
     # Создание записи о письме
@@ -183,20 +186,20 @@ async def send_email(
         status="queued"
     )
     db.add(email_message)
-    db.commit()
-    db.refresh(email_message)
+    await db.commit()
+    await db.refresh(email_message)
     
     # В реальности здесь должна быть отправка письма через SMTP или email-сервис
     # Для простоты просто помечаем как отправленное
     email_message.status = "sent"
     email_message.sent_at = datetime.utcnow()
-    db.commit()
-    logger.info(f"Email sent successfully: {email_message.id}")
-    return {
+    await db.commit()
+    logger.info("Email sent successfully: %s", email_message.id)
+    return JSONResponse({
         "message_id": email_message.id,
         "status": email_message.status,
-        "sent_at": email_message.sent_at.isoformat() + "Z" if email_message.sent_at else None
-    }
+        "sent_at": email_message.sent_at
+    })
 
 
 @app.get("/health")
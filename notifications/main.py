@@ -1,26 +1,39 @@
 from fastapi import FastAPI, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, String, DateTime, Text, Boolean, JSON, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from jose import JWTError, jwt
 from datetime import datetime
+from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator
+from shared.auth import TokenVerifier
+from shared.db import Database
+from shared.logs import RequestIdMiddleware, setup_logging
+from shared.responses import JSONResponse
+from shared.revocation import RevocationList, auth_service_fetch
+from shared.tracing import setup_tracing
 from typing import Optional
 import logging
 import os
 import uuid
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Настройка логирования: JSON-строки в stdout через очередь (см. shared/logs.py)
+setup_logging("notifications-service")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-security = HTTPBearer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схему создаёт migrate.py, здесь только подключение к базе
+    database.connect()
+    revocations.start()
+    yield
+    await revocations.stop()
+    await database.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+app.add_middleware(RequestIdMiddleware)
+setup_tracing(app, "notifications-service")
 
 # Настройка Prometheus метрик
 instrumentator = Instrumentator()
@@ -32,8 +45,7 @@ JWT_SECRET = os.getenv("JWT_SECRET", "secret_key_for_jwt")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+database = Database(DATABASE_URL)
 Base = declarative_base()
 
 
@@ -62,24 +74,15 @@ class Notification(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
-Base.metadata.create_all(bind=engine)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with database.session() as db:
         yield db
-    finally:
-        db.close()
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+# Отозванные токены синхронизируются с auth-service в фоне (см. shared/revocation.py)
+revocations = RevocationList(auth_service_fetch(AUTH_SERVICE_URL, JWT_SECRET, JWT_ALGORITHM))
+# Проверенные claims кэшируются до exp токена (см. shared/auth.py)
+verify_token = TokenVerifier(JWT_SECRET, JWT_ALGORITHM, revocations=revocations)
 
 
 def get_user_id(token_data: dict = Depends(verify_token)):
@@ -102,9 +105,9 @@ class SendNotificationRequest(BaseModel):
 async def disable_notifications(
     request: DeviceRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    device = db.query(Device).filter(Device.device_id == request.device_id).first()
+    device = await db.scalar(select(Device).where(Device.device_id == request.device_id))
     
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -114,7 +117,7 @@ async def disable_notifications(
         raise HTTPException(status_code=403, detail="Access denied")
     
     device.push_enabled = False
-    db.commit()
+    await db.commit()
     
     return {
         "user_id": f"user-{device.user_id}",
@@ -128,9 +131,9 @@ async def disable_notifications(
 async def enable_notifications(
     request: DeviceRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    device = db.query(Device).filter(Device.device_id == request.device_id).first()
+    device = await db.scalar(select(Device).where(Device.device_id == request.device_id))
     
     if not device:
         # Создаем новое устройство
@@ -146,8 +149,8 @@ async def enable_notifications(
             raise HTTPException(status_code=403, detail="Access denied")
         device.push_enabled = True
     
-    db.commit()
-    db.refresh(device)
+    await db.commit()
+    await db.refresh(device)
     
     return {
         "user_id": f"user-{device.user_id}",
@@ -161,21 +164,21 @@ async def enable_notifications(
 async def send_notification(
     request: SendNotificationRequest,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Sending notification to user: {request.user_id}, type: {request.type}")
+    logger.info("Sending notification to user: %s, type: %s", request.user_id, request.type)
     # Проверка существования пользователя (упрощенная)
     # В реальности нужно проверять через auth-service
     
     # Проверка, что устройство включено
-    devices = db.query(Device).filter(
+    devices = (await db.scalars(select(Device).where(
         Device.user_id == request.user_id,
         Device.push_enabled == True
-    ).all()
+    ))).all()
     
     if not devices:
         # В реальности может быть ошибка, но для простоты продолжаем
-        logger.warning(f"No enabled devices found for user: {request.user_id}")
+        logger.warning("No enabled devices found for user: %s", request.user_id)
     
     # Создание уведомления
     notification = Notification(
@@ -187,16 +190,16 @@ async def send_notification(
         status="sent"
     )
     db.add(notification)
-    db.commit()
-    db.refresh(notification)
+    await db.commit()
+    await db.refresh(notification)
     
     # В реальности здесь должна быть отправка через FCM, APNS и т.д.
-    logger.info(f"Notification sent successfully: {notification.id}")
-    return {
+    logger.info("Notification sent successfully: %s", notification.id)
+    return JSONResponse({
         "notification_id": notification.id,
         "status": notification.status,
-        "sent_at": notification.sent_at.isoformat() + "Z"
-    }
+        "sent_at": notification.sent_at
+    })
 
 
 @app.get("/health")
@@ -0,0 +1,16 @@
+#!/bin/bash
+# Потоковая реплика: при пустом томе копирует данные с $PRIMARY_HOST, дальше догоняет по WAL
+set -e
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+    until gosu postgres pg_basebackup -h "$PRIMARY_HOST" -U "$POSTGRES_USER" -D "$PGDATA" -R -X stream; do
+        echo "Waiting for primary $PRIMARY_HOST..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+fi
+
+exec docker-entrypoint.sh postgres
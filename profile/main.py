@@ -1,26 +1,39 @@
 from fastapi import FastAPI, HTTPException, Depends, Header
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import create_engine, Column, String, DateTime, Text, JSON
+from sqlalchemy import Column, String, DateTime, Text, JSON, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from jose import JWTError, jwt
 from datetime import datetime
+from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator
+from shared.auth import TokenVerifier
+from shared.db import Database
+from shared.logs import RequestIdMiddleware, setup_logging
+from shared.responses import JSONResponse
+from shared.revocation import RevocationList, auth_service_fetch
+from shared.tracing import setup_tracing
 import logging
 import os
 import uuid
 import httpx
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Настройка логирования: JSON-строки в stdout через очередь (см. shared/logs.py)
+setup_logging("profile-service")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-security = HTTPBearer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схему создаёт migrate.py, здесь только подключение к базе
+    database.connect()
+    revocations.start()
+    yield
+    await revocations.stop()
+    await database.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+app.add_middleware(RequestIdMiddleware)
+setup_tracing(app, "profile-service")
 
 # Настройка Prometheus метрик
 instrumentator = Instrumentator()
@@ -32,8 +45,7 @@ JWT_SECRET = os.getenv("JWT_SECRET", "secret_key_for_jwt")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+database = Database(DATABASE_URL)
 Base = declarative_base()
 
 
@@ -65,24 +77,15 @@ class Resume(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-Base.metadata.create_all(bind=engine)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with database.session() as db:
         yield db
-    finally:
-        db.close()
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+# Отозванные токены синхронизируются с auth-service в фоне (см. shared/revocation.py)
+revocations = RevocationList(auth_service_fetch(AUTH_SERVICE_URL, JWT_SECRET, JWT_ALGORITHM))
+# Проверенные claims кэшируются до exp токена (см. shared/auth.py)
+verify_token = TokenVerifier(JWT_SECRET, JWT_ALGORITHM, revocations=revocations)
 
 
 def get_user_id(token_data: dict = Depends(verify_token)):
@@ -140,10 +143,10 @@ class ResumeUpdate(BaseModel):
 async def update_passport(
     request: PassportUpdate,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Updating passport data for user: {user_id}")
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+    logger.info("Updating passport data for user: %s", user_id)
+    profile = await db.scalar(select(Profile).where(Profile.user_id == user_id))
     if not profile:
         profile = Profile(user_id=user_id)
         db.add(profile)
@@ -153,8 +156,8 @@ async def update_passport(
     profile.passport_issued_by = request.issued_by
     profile.passport_issued_date = request.issued_date
     
-    db.commit()
-    logger.info(f"Passport data updated successfully for user: {user_id}")
+    await db.commit()
+    logger.info("Passport data updated successfully for user: %s", user_id)
     return {"message": "Passport data updated successfully"}
 
 
@@ -162,15 +165,15 @@ async def update_passport(
 async def update_email(
     request: EmailUpdate,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+    profile = await db.scalar(select(Profile).where(Profile.user_id == user_id))
     if not profile:
         profile = Profile(user_id=user_id)
         db.add(profile)
     
     profile.email = request.new_email
-    db.commit()
+    await db.commit()
     
     return {"message": "Email updated successfully"}
 
@@ -179,15 +182,15 @@ async def update_email(
 async def update_phone(
     request: PhoneUpdate,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    profile = db.query(Profile).filter(Profile.user_id == user_id).first()
+    profile = await db.scalar(select(Profile).where(Profile.user_id == user_id))
     if not profile:
         profile = Profile(user_id=user_id)
         db.add(profile)
     
     profile.phone_number = request.phone_number
-    db.commit()
+    await db.commit()
     
     return {"message": "Phone number updated successfully"}
 
@@ -196,9 +199,9 @@ async def update_phone(
 async def create_resume(
     request: ResumeCreate,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Creating resume for user: {user_id}, title: {request.title}")
+    logger.info("Creating resume for user: %s, title: %s", user_id, request.title)
     resume = Resume(
         user_id=user_id,
         title=request.title,
@@ -209,9 +212,9 @@ async def create_resume(
         description=request.description
     )
     db.add(resume)
-    db.commit()
-    db.refresh(resume)
-    logger.info(f"Resume created successfully: r-{resume.id} for user: {user_id}")
+    await db.commit()
+    await db.refresh(resume)
+    logger.info("Resume created successfully: r-%s for user: %s", resume.id, user_id)
     return {"id": f"r-{resume.id}", "message": "Resume created successfully"}
 
 
@@ -220,13 +223,13 @@ async def update_resume(
     resume_id: str,
     request: ResumeUpdate,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Убираем префикс r- если есть
     if resume_id.startswith("r-"):
         resume_id = resume_id[2:]
     
-    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user_id).first()
+    resume = await db.scalar(select(Resume).where(Resume.id == resume_id, Resume.user_id == user_id))
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
@@ -243,7 +246,7 @@ async def update_resume(
     if request.description is not None:
         resume.description = request.description
     
-    db.commit()
+    await db.commit()
     
     return {"message": "Resume updated successfully"}
 
@@ -252,18 +255,18 @@ async def update_resume(
 async def delete_resume(
     resume_id: str,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     # Убираем префикс r- если есть
     if resume_id.startswith("r-"):
         resume_id = resume_id[2:]
     
-    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user_id).first()
+    resume = await db.scalar(select(Resume).where(Resume.id == resume_id, Resume.user_id == user_id))
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    db.delete(resume)
-    db.commit()
+    await db.delete(resume)
+    await db.commit()
     
     return {"message": "Resume deleted successfully"}
 
@@ -1,27 +1,40 @@
 from fastapi import FastAPI, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, Text, Integer, Boolean, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from jose import JWTError, jwt
 from datetime import datetime
+from contextlib import asynccontextmanager
 from prometheus_fastapi_instrumentator import Instrumentator
+from shared.auth import TokenVerifier
+from shared.db import Database
+from shared.logs import RequestIdMiddleware, setup_logging
+from shared.responses import JSONResponse
+from shared.revocation import RevocationList, auth_service_fetch
+from shared.tracing import setup_tracing
 from typing import Optional
 import logging
 import os
 import uuid
 import httpx
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Настройка логирования: JSON-строки в stdout через очередь (см. shared/logs.py)
+setup_logging("reviews-service")
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-security = HTTPBearer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Схему создаёт migrate.py, здесь только подключение к базе
+    database.connect()
+    revocations.start()
+    yield
+    await revocations.stop()
+    await database.dispose()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
+app.add_middleware(RequestIdMiddleware)
+setup_tracing(app, "reviews-service")
 
 # Настройка Prometheus метрик
 instrumentator = Instrumentator()
@@ -34,8 +47,7 @@ JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 JOBS_SERVICE_URL = os.getenv("JOBS_SERVICE_URL", "http://localhost:8003")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+database = Database(DATABASE_URL)
 Base = declarative_base()
 
 
@@ -52,24 +64,15 @@ class Review(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-Base.metadata.create_all(bind=engine)
-
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with database.session() as db:
         yield db
-    finally:
-        db.close()
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+# Отозванные токены синхронизируются с auth-service в фоне (см. shared/revocation.py)
+revocations = RevocationList(auth_service_fetch(AUTH_SERVICE_URL, JWT_SECRET, JWT_ALGORITHM))
+# Проверенные claims кэшируются до exp токена (см. shared/auth.py)
+verify_token = TokenVerifier(JWT_SECRET, JWT_ALGORITHM, revocations=revocations)
 
 
 def get_user_id(token_data: dict = Depends(verify_token)):
@@ -105,25 +108,25 @@ class ReviewUpdate(BaseModel):
 async def create_review(
     request: ReviewCreate,
     author_id: str = Depends(check_candidate_role),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    logger.info(f"Creating review by user: {author_id} for job: {request.job_id}")
+    logger.info("Creating review by user: %s for job: %s", author_id, request.job_id)
     # Проверка существования вакансии
     await check_job_exists(request.job_id)
     
     # Проверка, что отзыв еще не существует
-    existing_review = db.query(Review).filter(
+    existing_review = await db.scalar(select(Review).where(
         Review.job_id == request.job_id,
         Review.author_id == author_id
-    ).first()
+    ))
     
     if existing_review:
-        logger.warning(f"Review already exists for job: {request.job_id} by user: {author_id}")
+        logger.warning("Review already exists for job: %s by user: %s", request.job_id, author_id)
         raise HTTPException(status_code=409, detail="Review for this job already exists")
     
     # Валидация рейтинга
     if request.rating < 1 or request.rating > 5:
-        logger.warning(f"Invalid rating: {request.rating}")
+        logger.warning("Invalid rating: %s", request.rating)
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
     
     review = Review(
@@ -134,17 +137,17 @@ async def create_review(
         is_anonymous=request.is_anonymous
     )
     db.add(review)
-    db.commit()
-    db.refresh(review)
-    logger.info(f"Review created successfully: {review.id}")
-    return {
+    await db.commit()
+    await db.refresh(review)
+    logger.info("Review created successfully: %s", review.id)
+    return JSONResponse({
         "id": review.id,
         "job_id": review.job_id,
         "rating": review.rating,
         "comment": review.comment,
         "author_id": f"user-{review.author_id}",
-        "created_at": review.created_at.isoformat() + "Z"
-    }
+        "created_at": review.created_at
+    })
 
 
 @app.put("/api/reviews/{review_id}")
@@ -152,9 +155,9 @@ async def update_review(
     review_id: str,
     request: ReviewUpdate,
     user_id: str = Depends(get_user_id),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    review = db.query(Review).filter(Review.id == review_id).first()
+    review = await db.scalar(select(Review).where(Review.id == review_id))
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
@@ -170,16 +173,16 @@ async def update_review(
     review.comment = request.comment
     review.is_anonymous = request.is_anonymous
     
-    db.commit()
-    db.refresh(review)
+    await db.commit()
+    await db.refresh(review)
     
-    return {
+    return JSONResponse({
         "id": review.id,
         "job_id": review.job_id,
         "rating": review.rating,
         "comment": review.comment,
-        "updated_at": review.updated_at.isoformat() + "Z"
-    }
+        "updated_at": review.updated_at
+    })
 
 
 @app.get("/health")
@@ -0,0 +1 @@
+"""Общий код микросервисов: копируется в образ каждого сервиса рядом с main.py."""
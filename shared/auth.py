@@ -0,0 +1,88 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from prometheus_client import Counter
+
+from shared.revocation import RevocationList
+
+TOKEN_CACHE_LOOKUPS = Counter("auth_token_cache_lookups_total", "Decoded JWT cache lookups", ["result"])
+
+security = HTTPBearer()
+
+
+class TokenVerifier:
+    """Проверка JWT с кэшем уже проверенных claims.
+
+    Ключ кэша — SHA-256 токена, сам токен в памяти не хранится. Запись
+    живёт до exp токена, но не дольше JWT_CACHE_TTL секунд, так что
+    просроченный токен отклоняется так же, как без кэша. Кэшируются только
+    успешные проверки: подпись неверного токена проверяется каждый раз.
+    Если передан revocations, jti токена сверяется с ним при каждой
+    проверке, в том числе при попадании в кэш.
+
+    Экземпляр — готовая зависимость FastAPI: Depends(verify_token) отдаёт
+    claims или отвечает 401.
+    """
+
+    def __init__(
+        self,
+        secret: str,
+        algorithm: str,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+        revocations: Optional[RevocationList] = None,
+    ):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.maxsize = int(os.getenv("JWT_CACHE_SIZE", "10000")) if maxsize is None else maxsize
+        self.ttl = float(os.getenv("JWT_CACHE_TTL", "300")) if ttl is None else ttl
+        self._clock = clock
+        self.revocations = revocations
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def __call__(self, credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+        try:
+            return self.verify(credentials.credentials)
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+    def verify(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode()).digest()
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    TOKEN_CACHE_LOOKUPS.labels("hit").inc()
+                    self.check_revoked(claims)
+                    return dict(claims)
+                del self._entries[key]
+        TOKEN_CACHE_LOOKUPS.labels("miss").inc()
+
+        claims = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        self.check_revoked(claims)
+        expires_at = now + self.ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        if self.maxsize > 0 and expires_at > now:
+            with self._lock:
+                self._entries[key] = (expires_at, claims)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return dict(claims)
+
+    def check_revoked(self, claims: dict) -> None:
+        if self.revocations is not None and self.revocations.is_revoked(claims.get("jti")):
+            raise JWTError("Token has been revoked")
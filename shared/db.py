@@ -0,0 +1,220 @@
+import hashlib
+import itertools
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Синхронные драйверы из DATABASE_URL, которые подменяются на asyncpg
+SYNC_DRIVERS = ("postgresql", "postgresql+psycopg2", "postgres")
+
+# livesum: при нескольких воркерах gunicorn /metrics складывает значения живых процессов
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out of the pool", ["pool"],
+    multiprocess_mode="livesum"
+)
+POOL_IDLE = Gauge("db_pool_idle_connections", "Open connections idle in the pool", ["pool"], multiprocess_mode="livesum")
+POOL_WAITING = Gauge(
+    "db_pool_waiting_requests", "Requests waiting for a pool connection", ["pool"], multiprocess_mode="livesum"
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time spent acquiring a pool connection", ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Pool checkouts that hit DB_POOL_TIMEOUT", ["pool"])
+READ_SESSIONS = Counter("db_read_sessions_total", "Read-only sessions by target database", ["target"])
+
+# Запросы с этими методами не пишут в базу и не включают чтение с primary
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_COOKIE = "db_primary_until"
+
+
+def pool_options() -> dict:
+    # Настраивается в окружении каждого сервиса отдельно
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул asyncpg, который замеряет ожидание свободного соединения."""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        waiting = POOL_WAITING.labels(self.metrics_name)
+        waiting.inc()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(self.metrics_name).inc()
+            raise
+        finally:
+            waiting.dec()
+            POOL_WAIT_SECONDS.labels(self.metrics_name).observe(time.perf_counter() - started)
+            self._report_usage()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report_usage()
+
+    def _report_usage(self):
+        # Значения выставляются на событиях пула, а не считаются при сборе метрик:
+        # в режиме нескольких процессов /metrics читает только записанные значения
+        POOL_CHECKED_OUT.labels(self.metrics_name).set(self.checkedout())
+        POOL_IDLE.labels(self.metrics_name).set(self.checkedin())
+
+
+def async_database_url(url: str) -> str:
+    # В окружении и секретах DATABASE_URL остаётся в привычном виде postgresql://...
+    parsed = make_url(url)
+    if parsed.drivername in SYNC_DRIVERS:
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_engine(url: str, name: str = "primary", **options) -> AsyncEngine:
+    # Подкласс на каждое имя, а не атрибут экземпляра: dispose() пересоздаёт пул по классу
+    poolclass = type("InstrumentedPool", (InstrumentedPool,), {"metrics_name": name})
+    # Через модуль, а не импортированное имя: при включённой трассировке SQLAlchemyInstrumentor
+    # подменяет create_async_engine в модуле (см. shared/tracing.py)
+    return sqlalchemy_asyncio.create_async_engine(
+        async_database_url(url), poolclass=poolclass, **{**pool_options(), **options}
+    )
+
+
+def create_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    # expire_on_commit=False: после commit атрибуты не перечитываются неявно,
+    # ленивая загрузка в асинхронной сессии невозможна
+    return async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaRouter:
+    """Выбирает базу для читающих обработчиков.
+
+    Без DATABASE_REPLICA_URLS все сессии открываются на primary. С репликами
+    чтение распределяется по ним по кругу, кроме клиентов, которые недавно
+    писали: DB_REPLICA_STICKY_SECONDS секунд после успешного изменяющего
+    запроса они читают с primary и видят свои изменения, даже если реплика
+    отстаёт. Клиент узнаётся по заголовку Authorization в этом процессе и по
+    cookie db_primary_until в остальных экземплярах сервиса.
+    """
+
+    def __init__(self, primary_sessions: async_sessionmaker[AsyncSession], replica_urls: list[str]):
+        self.primary_sessions = primary_sessions
+        self.replica_engines = [create_engine(url, name=f"replica-{number}") for number, url in enumerate(replica_urls, 1)]
+        self.replica_sessions = [create_sessionmaker(engine) for engine in self.replica_engines]
+        self.sticky_seconds = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+        self._next_replica = itertools.cycle(self.replica_sessions)
+        self._recent_writers: dict[str, float] = {}
+
+    def read_sessionmaker(self, headers, cookies: dict) -> async_sessionmaker[AsyncSession]:
+        if not self.replica_sessions:
+            return self.primary_sessions
+        if self.sticky(headers, cookies):
+            READ_SESSIONS.labels("primary").inc()
+            return self.primary_sessions
+        READ_SESSIONS.labels("replica").inc()
+        return next(self._next_replica)
+
+    def note_write(self, key: str | None) -> float:
+        now = time.time()
+        if len(self._recent_writers) > 10000:
+            self._recent_writers = {writer: until for writer, until in self._recent_writers.items() if until > now}
+        until = now + self.sticky_seconds
+        if key:
+            self._recent_writers[key] = until
+        return until
+
+    def sticky(self, headers, cookies: dict) -> bool:
+        # True, только если реплики есть и клиент читает с primary из-за недавней записи
+        if not self.replica_sessions:
+            return False
+        now = time.time()
+        key = client_key(headers)
+        if key and self._recent_writers.get(key, 0) > now:
+            return True
+        try:
+            # Значение cookie задаёт клиент: верим ему не дальше окна прилипания
+            return now < float(cookies.get(STICKY_COOKIE)) <= now + self.sticky_seconds
+        except (TypeError, ValueError):
+            return False
+
+
+def client_key(headers) -> str | None:
+    authorization = headers.get("authorization")
+    return hashlib.sha256(authorization.encode()).hexdigest() if authorization else None
+
+
+class Database:
+    """Подключение сервиса к PostgreSQL: primary и необязательные реплики.
+
+    Объект создаётся при импорте main.py, но ничего не открывает: движки
+    появляются в connect() из lifespan приложения и закрываются в dispose().
+    Поэтому импорт модуля в тестах, миграциях и бенчмарках не трогает базу.
+    """
+
+    def __init__(self, url: str, replica_urls: list[str] = ()):
+        self.url = url
+        self.replica_urls = list(replica_urls)
+        self.engine: AsyncEngine | None = None
+        self.router: ReplicaRouter | None = None
+
+    def connect(self):
+        # Движок не открывает соединений до первого запроса
+        if self.engine is None:
+            self.engine = create_engine(self.url)
+            self.router = ReplicaRouter(create_sessionmaker(self.engine), self.replica_urls)
+
+    async def dispose(self):
+        if self.engine is None:
+            return
+        for engine in [self.engine, *self.router.replica_engines]:
+            await engine.dispose()
+        self.engine = None
+        self.router = None
+
+    def session(self) -> AsyncSession:
+        return self._connected_router().primary_sessions()
+
+    def read_session(self, headers, cookies: dict) -> AsyncSession:
+        return self._connected_router().read_sessionmaker(headers, cookies)()
+
+    def _connected_router(self) -> ReplicaRouter:
+        if self.router is None:
+            raise RuntimeError("Database is not connected: call connect() in the application lifespan")
+        return self.router
+
+
+class ReadYourWritesMiddleware:
+    """Отмечает клиентов, чей изменяющий запрос завершился успешно."""
+
+    def __init__(self, app, database: Database):
+        self.app = app
+        self.database = database
+
+    async def __call__(self, scope, receive, send):
+        router = self.database.router
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or router is None or not router.replica_sessions:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+                until = router.note_write(client_key(headers))
+                cookie = f"{STICKY_COOKIE}={until:.3f}; Max-Age={int(router.sticky_seconds) + 1}; Path=/; HttpOnly"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,42 @@
+"""
+Конфигурация gunicorn для всех сервисов: gunicorn main:app -c shared/gunicorn_conf.py
+
+Мастер-процесс gunicorn запускает WEB_CONCURRENCY воркеров uvicorn.
+Метрики воркеров пишутся в файлы PROMETHEUS_MULTIPROC_DIR, и /metrics
+любого воркера отдаёт их сумму по всем процессам.
+
+Сигналы мастеру: SIGTERM — плавная остановка (воркеры дообслуживают
+запросы до GRACEFUL_TIMEOUT секунд), SIGHUP — плавный перезапуск
+воркеров с перечитыванием кода, TTIN/TTOU — добавить или убрать воркер.
+"""
+import os
+import shutil
+
+# Переменная должна быть задана до импорта prometheus_client: воркеры наследуют
+# модуль от мастера, и режим хранения значений выбирается при импорте
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus-multiproc")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+accesslog = "-"
+# Приложение импортирует каждый воркер: SIGHUP подхватывает новый код, а соединения
+# с базой и фоновые задачи не переживают fork мастера
+preload_app = False
+
+
+def on_starting(server):
+    # Файлы прошлого запуска контейнера дали бы метрики несуществующих процессов
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    # Gauge в режиме live* перестают учитывать значения завершившегося воркера
+    multiprocess.mark_process_dead(worker.pid)
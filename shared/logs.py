@@ -0,0 +1,217 @@
+import atexit
+import contextvars
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+import orjson
+from prometheus_client import Counter
+
+from shared.responses import OPTIONS, default
+
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+REQUEST_ID_HEADER = "x-request-id"
+# Чужой X-Request-ID принимается, только если похож на идентификатор, а не на произвольный текст
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Логгеры uvicorn и gunicorn пишут через свои обработчики; их записи тоже отправляются в общую очередь
+SERVER_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access", "gunicorn.error", "gunicorn.access")
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Атрибуты, которые есть у любой LogRecord: всё остальное пришло через extra= и попадает в JSON.
+# color_message uvicorn дублирует message с ANSI-цветами
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "color_message"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _json_default(value):
+    try:
+        return default(value)
+    except TypeError:
+        return str(value)
+
+
+class JSONFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON для Promtail/Loki."""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc),
+            "level": record.levelname.lower(),
+            "service": self.service,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES and not name.startswith("_"):
+                document[name] = value
+        if record.exc_info:
+            document["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            document["exception"] = record.exc_text
+        return orjson.dumps(document, default=_json_default, option=OPTIONS).decode()
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Выполняется в потоке, который пишет лог: contextvar ещё видит текущий запрос
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю rate записей логгера ниже WARNING.
+
+    Решение принимается по request_id, так что строки одного запроса
+    остаются или отбрасываются вместе. Сохранённая запись получает поле
+    sample_rate, чтобы по логам можно было оценить исходный объём.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        request_id = request_id_var.get()
+        if request_id is not None:
+            keep = zlib.crc32(request_id.encode()) / 2 ** 32 < self.rate
+        else:
+            keep = random.random() < self.rate
+        if keep:
+            record.sample_rate = self.rate
+        return keep
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который не форматирует запись и не ждёт места в очереди.
+
+    В потоке запроса только подставляются аргументы сообщения;
+    JSON и traceback собирает поток QueueListener. При переполненной очереди
+    запись отбрасывается и учитывается в log_records_dropped_total.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def parse_sampling(value: str) -> dict[str, float]:
+    # LOG_SAMPLING="main=0.1,uvicorn.access=0.01"
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            rates[name] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+def setup_logging(service: str) -> None:
+    """Направляет логи процесса в stdout через очередь и поток QueueListener.
+
+    LOG_LEVEL — уровень корневого логгера, LOG_FORMAT — json (по умолчанию)
+    или text, LOG_QUEUE_SIZE — размер очереди, LOG_SAMPLING — доли
+    записей для шумных логгеров. Повторный вызов заменяет прежнюю настройку.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    output = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json") == "text":
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    else:
+        output.setFormatter(JSONFormatter(service))
+
+    handler = NonBlockingQueueHandler(queue.Queue(int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name in SERVER_LOGGERS:
+        server_logger = logging.getLogger(name)
+        server_logger.handlers.clear()
+        server_logger.propagate = True
+
+    # Фильтр логгера действует только на его собственные записи, не на записи потомков
+    for name, rate in parse_sampling(os.getenv("LOG_SAMPLING", "")).items():
+        sampled = logging.getLogger(name)
+        for existing in sampled.filters[:]:
+            if isinstance(existing, SamplingFilter):
+                sampled.removeFilter(existing)
+        if rate < 1.0:
+            sampled.addFilter(SamplingFilter(rate))
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+@atexit.register
+def _flush_logs() -> None:
+    # Записи, оставшиеся в очереди при остановке процесса, дописываются в stdout
+    if _listener is not None:
+        _listener.stop()
+
+
+class RequestIdMiddleware:
+    """Назначает запросу request_id для логов и возвращает его в X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode("latin-1"):
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
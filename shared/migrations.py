@@ -0,0 +1,115 @@
+import logging
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+
+from shared.db import create_engine
+
+logger = logging.getLogger("migrate")
+
+# Общий ключ advisory lock: несколько реплик сервиса не применяют миграции одновременно
+MIGRATIONS_LOCK_ID = 730_001
+# ALTER TABLE не должен надолго вставать в очередь за долгими транзакциями
+LOCK_TIMEOUT = "5s"
+
+
+# Комментарий перед запросом: выполнять его повторно, каждый раз отдельной
+# транзакцией, пока он меняет строки (заполнение колонки пачками)
+REPEAT_DIRECTIVE = "-- migrate: repeat"
+
+
+def split_statements(sql: str) -> list[str]:
+    # Точка с запятой внутри тела функции в $$ ... $$ запрос не завершает
+    statements, current = [], ""
+    for number, part in enumerate(sql.split("$$")):
+        if number % 2:
+            current += f"$${part}$$"
+            continue
+        pieces = part.split(";")
+        current += pieces[0]
+        for piece in pieces[1:]:
+            statements.append(current)
+            current = piece
+    statements.append(current)
+    return statements
+
+
+def read_statements(path: Path) -> list[tuple[str, bool]]:
+    """Запросы файла миграции и признак повторения из REPEAT_DIRECTIVE."""
+    lines = [
+        line for line in path.read_text(encoding="utf-8").splitlines()
+        if not line.lstrip().startswith("--") or line.strip() == REPEAT_DIRECTIVE
+    ]
+    statements = []
+    for statement in split_statements("\n".join(lines)):
+        repeat = REPEAT_DIRECTIVE in statement
+        statement = statement.replace(REPEAT_DIRECTIVE, "").strip()
+        if statement:
+            statements.append((statement, repeat))
+    return statements
+
+
+async def execute_repeated(connection, statement: str):
+    # AUTOCOMMIT: каждая пачка фиксируется сразу и не держит блокировки строк до конца миграции
+    total = 0
+    while rows := (await connection.exec_driver_sql(statement)).rowcount:
+        total += rows
+        logger.info("Batched migration statement changed %s rows so far", total)
+
+
+async def drop_invalid_indexes(connection):
+    # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс,
+    # который IF NOT EXISTS иначе посчитал бы уже построенным
+    invalid = (await connection.execute(text(
+        "SELECT c.relname FROM pg_index i "
+        "JOIN pg_class c ON c.oid = i.indexrelid "
+        "JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = current_schema() AND NOT i.indisvalid"
+    ))).scalars().all()
+    for name in invalid:
+        logger.warning("Dropping invalid index left by an interrupted build: %s", name)
+        await connection.exec_driver_sql(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+
+async def run_migrations(database_url: str, metadata, migrations_dir: Optional[Path] = None):
+    """Создаёт недостающие таблицы из metadata и применяет SQL-файлы из
+    migrations_dir по порядку имён, отмечая их в schema_migrations.
+
+    Всё выполняется под advisory lock и в AUTOCOMMIT, чтобы работал
+    CREATE INDEX CONCURRENTLY. Шаги идемпотентны: прерванную миграцию
+    достаточно запустить повторно.
+    """
+    engine = create_engine(database_url, name="migrations", pool_size=1, max_overflow=0)
+    try:
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATIONS_LOCK_ID})
+            try:
+                await connection.exec_driver_sql(f"SET lock_timeout = '{LOCK_TIMEOUT}'")
+                await connection.run_sync(metadata.create_all)
+                await connection.exec_driver_sql(
+                    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                    "version VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+                )
+                applied = set((await connection.execute(text("SELECT version FROM schema_migrations"))).scalars())
+                await drop_invalid_indexes(connection)
+
+                for path in sorted(migrations_dir.glob("*.sql")) if migrations_dir else []:
+                    if path.stem in applied:
+                        continue
+                    logger.info("Applying migration %s", path.stem)
+                    for statement, repeat in read_statements(path):
+                        if repeat:
+                            await execute_repeated(connection, statement)
+                        else:
+                            await connection.exec_driver_sql(statement)
+                    await connection.execute(
+                        text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                        {"version": path.stem}
+                    )
+                logger.info("Database schema is up to date")
+            finally:
+                await connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATIONS_LOCK_ID})
+    finally:
+        await engine.dispose()
@@ -0,0 +1,44 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse as StarletteJSONResponse
+
+# Время в базе хранится наивным UTC (datetime.utcnow), поэтому наивные datetime
+# пишутся с суффиксом Z: 2024-05-01T12:30:15.123456Z
+OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def default(value: Any) -> Any:
+    # Decimal — как в jsonable_encoder FastAPI: целое без дробной части, иначе float
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=default, option=OPTIONS)
+
+
+def format_datetime(value) -> str:
+    """Тот же вид даты, что в JSON-ответах, для CSV и других текстовых форматов; None — пустая строка."""
+    if value is None:
+        return ""
+    return dumps(value)[1:-1].decode()
+
+
+class JSONResponse(StarletteJSONResponse):
+    """JSON-ответ через orjson.
+
+    Подключается как default_response_class. Обработчик, который вернул
+    словарь, всё равно проходит через jsonable_encoder FastAPI, и datetime
+    там превращаются в строки без Z. Поэтому ответы с датами и большие
+    выдачи возвращают JSONResponse(...) явно: тогда словарь, datetime,
+    Decimal и pydantic-модели сериализует сразу orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
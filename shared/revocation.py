@@ -0,0 +1,133 @@
+"""
+Список отозванных access-токенов, который сервисы держат в памяти.
+
+Токен отзывается в auth-service (выход из системы); остальные сервисы
+раз в REVOCATION_SYNC_INTERVAL секунд (по умолчанию 10, 0 — выключить)
+забирают у него все отзывы, срок действия которых ещё не истёк, и
+проверяют jti токена по локальному множеству без сетевых запросов.
+Список ограничен временем жизни access-токена, так что остаётся
+небольшим. Если auth-service недоступен, сервис продолжает работать
+с последним полученным списком.
+
+Список отдаётся только сервисам: запрос подписан коротким JWT с ролью
+SERVICE_ROLE на общем JWT_SECRET. Пользовательские токены такой роли не
+получают — auth-service выдаёт только candidate и employer.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+import orjson
+from jose import jwt
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_SYNCS = Counter("auth_revocation_syncs_total", "Revoked token list synchronizations", ["result"])
+
+Fetch = Callable[[], Awaitable[dict[str, float]]]
+
+SERVICE_ROLE = "service"
+SERVICE_TOKEN_TTL = 60
+
+
+class RevocationList:
+    """jti отозванных токенов с их exp (Unix-время) и фоновая синхронизация.
+
+    fetch возвращает полный актуальный список {jti: exp}; он заменяет
+    локальный целиком, поэтому пропущенная синхронизация ничего не теряет.
+    Отзывы, добавленные через add() после начала запроса, в ответе могут
+    отсутствовать, поэтому они сохраняются поверх полученного списка.
+    """
+
+    def __init__(self, fetch: Fetch, interval: Optional[float] = None, clock: Callable[[], float] = time.time):
+        self.fetch = fetch
+        self.interval = float(os.getenv("REVOCATION_SYNC_INTERVAL", "10")) if interval is None else interval
+        self._clock = clock
+        self._revoked: dict[str, float] = {}
+        # Локальные отзывы с порядковым номером: sync переносит в новый список те,
+        # что сделаны после начала запроса
+        self._added = 0
+        self._recent: dict[str, tuple[int, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def add(self, jti: str, expires_at: float) -> None:
+        # Отзыв, сделанный в этом процессе, действует сразу, не дожидаясь синхронизации
+        self._revoked[jti] = expires_at
+        self._added += 1
+        self._recent[jti] = (self._added, expires_at)
+
+    def replace(self, revoked: dict[str, float], since: Optional[int] = None) -> None:
+        """Заменяет список на revoked, сохраняя отзывы из add() с номером больше since.
+
+        since — значение счётчика add() на момент начала запроса за revoked;
+        по умолчанию текущее, то есть revoked уже содержит все локальные отзывы.
+        """
+        now = self._clock()
+        since = self._added if since is None else since
+        self._recent = {jti: entry for jti, entry in self._recent.items() if entry[0] > since}
+        self._revoked = {jti: expires_at for jti, expires_at in revoked.items() if expires_at > now}
+        for jti, (_, expires_at) in self._recent.items():
+            if expires_at > now:
+                self._revoked[jti] = expires_at
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def sync(self) -> bool:
+        started = self._added
+        try:
+            revoked = await self.fetch()
+        except Exception as error:
+            REVOCATION_SYNCS.labels("error").inc()
+            logger.warning("Revoked token list sync failed, keeping %s known entries: %r", len(self), error)
+            return False
+        self.replace(revoked, since=started)
+        REVOCATION_SYNCS.labels("ok").inc()
+        return True
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._sync_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sync_forever(self):
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.interval)
+
+
+def service_token(secret: str, algorithm: str) -> str:
+    return jwt.encode(
+        {"sub": "revocation-sync", "role": SERVICE_ROLE, "exp": int(time.time()) + SERVICE_TOKEN_TTL},
+        secret, algorithm=algorithm
+    )
+
+
+def auth_service_fetch(auth_service_url: str, secret: str, algorithm: str, timeout: float = 5.0) -> Fetch:
+    url = f"{auth_service_url.rstrip('/')}/api/auth/revocations"
+
+    async def fetch() -> dict[str, float]:
+        # httpx нужен только сервисам, которые забирают список у auth-service
+        import httpx
+
+        headers = {"Authorization": f"Bearer {service_token(secret, algorithm)}"}
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.get(url, headers=headers)
+            response.raise_for_status()
+            return orjson.loads(response.content)["revoked"]
+
+    return fetch
@@ -0,0 +1,90 @@
+"""
+Трассировка OpenTelemetry для сервисов.
+
+Включается переменной OTEL_TRACES_EXPORTER:
+- none (по умолчанию) — трассировка выключена, пакеты opentelemetry
+  даже не импортируются;
+- otlp — спаны уходят в коллектор по OTLP/HTTP, адрес задаёт
+  OTEL_EXPORTER_OTLP_ENDPOINT (например, http://otel-collector:4318);
+- file — спаны пишутся JSON-строками в OTEL_TRACES_FILE.
+
+Спаны создаются для маршрутов FastAPI, запросов SQLAlchemy и исходящих
+запросов httpx. Контекст передаётся между сервисами заголовком W3C
+traceparent. Остальные настройки SDK берутся из стандартных переменных
+OTEL_*: OTEL_SERVICE_NAME, OTEL_TRACES_SAMPLER и OTEL_TRACES_SAMPLER_ARG,
+OTEL_BSP_* для пакетной отправки.
+"""
+import logging
+import os
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+EXPORTERS = ("none", "otlp", "file")
+# Служебные эндпоинты опрашиваются Prometheus, healthcheck и фоновой синхронизацией
+# списка отозванных токенов — их спаны только шум
+EXCLUDED_URLS = "health,metrics,api/auth/revocations"
+
+_provider = None
+
+
+def span_exporter(name: str):
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        return OTLPSpanExporter()
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    # Строка на спан; файл открыт на дозапись, так что воркеры gunicorn могут писать в один файл
+    output = open(os.getenv("OTEL_TRACES_FILE", "/tmp/traces.jsonl"), "a", buffering=1)
+    return ConsoleSpanExporter(out=output, formatter=lambda span: span.to_json(indent=None) + "\n")
+
+
+def tracer_provider(service: str):
+    """Общий TracerProvider процесса; None, если трассировка выключена."""
+    global _provider
+
+    name = os.getenv("OTEL_TRACES_EXPORTER", "none")
+    if name not in EXPORTERS:
+        raise ValueError(f"Unknown OTEL_TRACES_EXPORTER: {name}, expected one of {', '.join(EXPORTERS)}")
+    if name == "none":
+        return None
+    if _provider is not None:
+        return _provider
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    # Сэмплер TracerProvider читает из OTEL_TRACES_SAMPLER сам
+    _provider = TracerProvider(resource=Resource.create({SERVICE_NAME: os.getenv("OTEL_SERVICE_NAME", service)}))
+    # Спаны отправляет фоновый поток BatchSpanProcessor, обработчик запроса их не ждёт
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter(name)))
+    trace.set_tracer_provider(_provider)
+    logger.info("Tracing enabled for %s, exporter: %s", service, name)
+    return _provider
+
+
+def setup_tracing(app: FastAPI, service: str) -> None:
+    provider = tracer_provider(service)
+    if provider is None:
+        return
+
+    from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+
+    FastAPIInstrumentor.instrument_app(app, tracer_provider=provider, excluded_urls=EXCLUDED_URLS)
+    # Инструменторы подменяют функции модулей (sqlalchemy.ext.asyncio.create_async_engine
+    # и httpx.AsyncClient), поэтому вызываются до того, как lifespan создаст движки,
+    # и действуют на все клиенты процесса
+    if not SQLAlchemyInstrumentor().is_instrumented_by_opentelemetry:
+        SQLAlchemyInstrumentor().instrument(tracer_provider=provider)
+    try:
+        from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    except ImportError:
+        # httpx и его инструментация есть только у сервисов, которые ходят в соседей
+        return
+    if not HTTPXClientInstrumentor().is_instrumented_by_opentelemetry:
+        HTTPXClientInstrumentor().instrument(tracer_provider=provider)